@@ -0,0 +1,69 @@
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_repository_queries import INSERT_BATCH_SIZE, make_article
+from src.db.article_repository import INSERT_SQL, ArticleRepository
+
+
+def populate(repo: ArticleRepository, start: int, stop: int) -> None:
+    for batch_start in range(start, stop, INSERT_BATCH_SIZE):
+        batch_stop = min(batch_start + INSERT_BATCH_SIZE, stop)
+        articles = [make_article(i) for i in range(batch_start, batch_stop)]
+        with repo._conn:
+            repo._conn.executemany(
+                INSERT_SQL, [(a.title, a.url, a.summary, a.source, a.published) for a in articles]
+            )
+
+
+def measure(load) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = load()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "retained_mb": round(retained / 2**20, 1),
+        "peak_mb": round(peak / 2**20, 1),
+        "bytes_per_row": retained // max(count, 1),
+    }
+
+
+def run(sizes: list[int]) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with ArticleRepository(os.path.join(tmp_dir, "bench.db")) as repo:
+            current = 0
+            for size in sizes:
+                populate(repo, current, size)
+                current = size
+                results.append({"representation": "dict", **measure(repo.get_all)})
+                results.append(
+                    {
+                        "representation": "article",
+                        **measure(lambda: list(repo.iter_articles())),
+                    }
+                )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="記事の行表現ごとのメモリ使用量ベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args(argv)
+    for result in run(args.sizes):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+import anthropic
+
+from benchmarks.bench_repository_queries import make_article
+from benchmarks.fake_services import RELEVANT_WORDS, FakeServices
+from src.collector.hn_collector import HnCollector
+from src.collector.rss_collector import RssCollector
+from src.db.article_repository import ArticleRepository
+from src.summarizer.article_summarizer import ArticleSummarizer
+
+HN_MODES = {
+    "hn.fetch_relevant_stories": "sync",
+    "hn.fetch_relevant_stories_async": "async",
+    "hn.fetch_relevant_stories_async_prefetch": "prefetch",
+}
+
+BENCHMARKS = (
+    "rss.fetch_all_feeds",
+    *HN_MODES,
+    "repository.save_many",
+    "summarizer.summarize_articles",
+)
+
+
+def measure(fn, repeat: int) -> dict:
+    samples = []
+    items = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    p50 = statistics.median(samples)
+    return {
+        "items": items,
+        "throughput_per_s": round(items / p50, 1) if p50 else None,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(samples[math.ceil(len(samples) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def bench_rss(services: FakeServices, args) -> dict:
+    collector = RssCollector(max_workers=args.rss_workers)
+    feeds = services.feed_config()
+    try:
+        return measure(lambda: len(collector.fetch_all_feeds(feeds)), args.repeat)
+    finally:
+        collector.close()
+
+
+def bench_hn(services: FakeServices, args, mode: str) -> dict:
+    def run_once() -> int:
+        collector = HnCollector(
+            keywords=RELEVANT_WORDS,
+            max_stories=args.stories,
+            base_url=services.hn_base_url,
+            concurrency=args.hn_concurrency,
+            title_prefetch_url=services.title_prefetch_url if mode == "prefetch" else None,
+        )
+        if mode == "sync":
+            return len(collector.fetch_relevant_stories())
+        return len(asyncio.run(collector.fetch_relevant_stories_async()))
+
+    return measure(run_once, args.repeat)
+
+
+def bench_save_many(args) -> dict:
+    counter = itertools.count()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with ArticleRepository(os.path.join(tmp_dir, "bench.db")) as repo:
+
+            def run_once() -> int:
+                start = next(counter) * args.save_batch
+                articles = [make_article(i) for i in range(start, start + args.save_batch)]
+                return repo.save_many(articles)
+
+            return measure(run_once, args.repeat)
+
+
+def bench_summarize(services: FakeServices, args) -> dict:
+    client = anthropic.Anthropic(api_key="bench", base_url=services.base_url, max_retries=0)
+    summarizer = ArticleSummarizer(
+        api_key="bench", client=client, max_workers=args.summarize_workers
+    )
+    counter = itertools.count()
+
+    def run_once() -> int:
+        start = next(counter) * args.summarize_articles
+        articles = [make_article(i) for i in range(start, start + args.summarize_articles)]
+        results = summarizer.summarize_articles(articles)
+        failed = [result for result in results if result["summary"] is None]
+        if failed:
+            raise RuntimeError(failed[0]["error"])
+        return len(results)
+
+    try:
+        return measure(run_once, args.repeat)
+    finally:
+        client.close()
+
+
+def run(args) -> list[dict]:
+    selected = [name for name in BENCHMARKS if not args.only or name in args.only]
+    revision = git_revision()
+    results = []
+    with FakeServices(
+        latency=args.latency_ms / 1000,
+        feeds=args.feeds,
+        items_per_feed=args.items_per_feed,
+        stories=args.stories,
+    ) as services:
+        for name in selected:
+            if name == "rss.fetch_all_feeds":
+                params = {"feeds": args.feeds, "items_per_feed": args.items_per_feed}
+                measured = bench_rss(services, args)
+            elif name in HN_MODES:
+                params = {"stories": args.stories, "concurrency": args.hn_concurrency}
+                measured = bench_hn(services, args, HN_MODES[name])
+            elif name == "repository.save_many":
+                params = {"batch": args.save_batch}
+                measured = bench_save_many(args)
+            else:
+                params = {"articles": args.summarize_articles, "workers": args.summarize_workers}
+                measured = bench_summarize(services, args)
+            results.append(
+                {
+                    "benchmark": name,
+                    "revision": revision,
+                    "latency_ms": args.latency_ms,
+                    "repeat": args.repeat,
+                    **params,
+                    **measured,
+                }
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="ローカルのスタブサーバーを使ったホットパスのベンチマーク"
+    )
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--feeds", type=int, default=20)
+    parser.add_argument("--items-per-feed", type=int, default=50)
+    parser.add_argument("--rss-workers", type=int, default=8)
+    parser.add_argument("--stories", type=int, default=200)
+    parser.add_argument("--hn-concurrency", type=int, default=10)
+    parser.add_argument("--save-batch", type=int, default=1000)
+    parser.add_argument("--summarize-articles", type=int, default=50)
+    parser.add_argument("--summarize-workers", type=int, default=8)
+    args = parser.parse_args(argv)
+    for result in run(args):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+
+from src.collector.rss_collector import Article
+from src.db.article_repository import ArticleRepository
+
+UNSUMMARIZED_BACKLOG = 100
+PAGE_LIMIT = 100
+INSERT_BATCH_SIZE = 50_000
+SUMMARY_WORDS = 40
+
+_rng = random.Random(0)
+VOCABULARY = [
+    "".join(_rng.choices(string.ascii_lowercase, k=_rng.randint(3, 9))) for _ in range(20_000)
+]
+
+
+SEARCH_QUERIES = {
+    "single_term": VOCABULARY[0],
+    "two_terms": f"{VOCABULARY[1]} {VOCABULARY[2]}",
+    "common_term": "Title 4242",
+    "short_term": "AI",
+    "rare_short_term": "Go",
+    "short_and_long_terms": f"AI {VOCABULARY[0]}",
+    "short_japanese_term": "要約",
+}
+
+SHORT_TERMS = {10: "AI", 1000: "Go"}
+
+
+def make_article(i: int) -> Article:
+    rng = random.Random(i)
+    words = rng.choices(VOCABULARY, k=SUMMARY_WORDS)
+    words.extend(term for every, term in SHORT_TERMS.items() if i % every == 0)
+    return Article(
+        f"Title {i}",
+        f"https://example.com/{i}",
+        " ".join(words),
+        "Bench",
+        "",
+    )
+
+
+def near_duplicate_of(article: Article) -> Article:
+    words = article.summary.split()
+    words[len(words) // 2] = "edited"
+    return Article(
+        article.title,
+        article.url.replace("example.com", "mirror.example.org"),
+        " ".join(words),
+        "",
+        "",
+    )
+
+
+def populate(repo: ArticleRepository, start: int, stop: int) -> None:
+    for batch_start in range(start, stop, INSERT_BATCH_SIZE):
+        batch_stop = min(batch_start + INSERT_BATCH_SIZE, stop)
+        repo.save_many([make_article(i) for i in range(batch_start, batch_stop)])
+    with repo._conn:
+        repo._conn.execute("UPDATE articles SET is_summarized = 1 WHERE is_summarized = 0")
+        repo._conn.execute(
+            "UPDATE articles SET is_summarized = 0 WHERE id IN "
+            "(SELECT id FROM articles ORDER BY id DESC LIMIT ?)",
+            (UNSUMMARIZED_BACKLOG,),
+        )
+
+
+def measure(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+    }
+
+
+def run(sizes: list[int], repeat: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with ArticleRepository(os.path.join(tmp_dir, "bench.db")) as repo:
+            current = 0
+            for size in sizes:
+                populate(repo, current, size)
+                current = size
+                repo._conn.execute("ANALYZE")
+                results.append(
+                    {
+                        "benchmark": "get_unsummarized",
+                        "rows": size,
+                        "backlog": UNSUMMARIZED_BACKLOG,
+                        **measure(repo.get_unsummarized, repeat),
+                    }
+                )
+                results.append(
+                    {
+                        "benchmark": "get_all_first_page",
+                        "rows": size,
+                        "limit": PAGE_LIMIT,
+                        **measure(lambda: repo.get_all(limit=PAGE_LIMIT), repeat),
+                    }
+                )
+                for label, query in SEARCH_QUERIES.items():
+                    results.append(
+                        {
+                            "benchmark": f"search_{label}",
+                            "rows": size,
+                            "query": query,
+                            "hits": len(repo.search(query, limit=PAGE_LIMIT)),
+                            **measure(lambda: repo.search(query, limit=20), repeat),
+                        }
+                    )
+                duplicate = near_duplicate_of(make_article(size // 2))
+                assert repo.find_duplicate(duplicate) is not None
+                results.append(
+                    {
+                        "benchmark": "find_duplicate",
+                        "rows": size,
+                        **measure(lambda: repo.find_duplicate(duplicate), repeat),
+                    }
+                )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="ArticleRepository クエリのベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+    for result in run(args.sizes, args.repeat):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
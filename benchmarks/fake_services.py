@@ -0,0 +1,168 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RELEVANT_WORDS = ["LLM", "machine learning", "GPT", "data engineering"]
+FILLER_WORDS = ["database", "kernel", "startup", "browser", "compiler", "network", "garden"]
+
+_FEED_RE = re.compile(r"^/feeds/(\d+)\.xml$")
+_ITEM_RE = re.compile(r"^/v0/item/(\d+)\.json$")
+_STORY_TAG_RE = re.compile(r"story_(\d+)")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data) -> None:
+        self._send(200, json.dumps(data).encode(), "application/json")
+
+    def do_GET(self):
+        services = self.server.services
+        services.delay()
+        parts = urlsplit(self.path)
+        if match := _FEED_RE.match(parts.path):
+            self._send(200, services.feed_xml(int(match.group(1))), "application/rss+xml")
+        elif parts.path == "/v0/topstories.json":
+            self._send_json(services.story_ids())
+        elif match := _ITEM_RE.match(parts.path):
+            self._send_json(services.story(int(match.group(1))))
+        elif parts.path == "/algolia/search":
+            tags = parse_qs(parts.query).get("tags", [""])[0]
+            ids = [int(story_id) for story_id in _STORY_TAG_RE.findall(tags)]
+            hits = [{"objectID": str(i), "title": services.story(i)["title"]} for i in ids]
+            self._send_json({"hits": hits})
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        services = self.server.services
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        services.delay()
+        if urlsplit(self.path).path != "/v1/messages":
+            self._send(404, b"not found", "text/plain")
+            return
+        content = request["messages"][0]["content"]
+        self._send_json(
+            {
+                "id": "msg_bench",
+                "type": "message",
+                "role": "assistant",
+                "model": request["model"],
+                "content": [{"type": "text", "text": f"要約: {content[:40]}"}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": len(content) // 2 + 1, "output_tokens": 64},
+            }
+        )
+
+
+class FakeServices:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        feeds: int = 20,
+        items_per_feed: int = 50,
+        stories: int = 500,
+        relevant_ratio: float = 0.3,
+    ):
+        self.latency = latency
+        self.feeds = feeds
+        self.items_per_feed = items_per_feed
+        self.stories = stories
+        self.relevant_ratio = relevant_ratio
+        self._feed_cache: dict[int, bytes] = {}
+        self._server = None
+        self._thread = None
+
+    def delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def feed_xml(self, feed_id: int) -> bytes:
+        if feed_id not in self._feed_cache:
+            items = "".join(
+                f"<item><title>Feed {feed_id} article {i}</title>"
+                f"<link>https://feed{feed_id}.example.com/{i}</link>"
+                f"<guid>feed{feed_id}-{i}</guid>"
+                f"<pubDate>Mon, 06 Jan 2025 {i % 24:02d}:00:00 GMT</pubDate>"
+                f"<description>{' '.join(FILLER_WORDS)} {i}</description></item>"
+                for i in range(self.items_per_feed)
+            )
+            self._feed_cache[feed_id] = (
+                '<?xml version="1.0"?><rss version="2.0"><channel>'
+                f"<title>Feed {feed_id}</title>{items}</channel></rss>"
+            ).encode()
+        return self._feed_cache[feed_id]
+
+    def story_ids(self) -> list[int]:
+        return list(range(1, self.stories + 1))
+
+    def story(self, story_id: int) -> dict:
+        rng = random.Random(story_id)
+        words = rng.sample(FILLER_WORDS, 3)
+        if rng.random() < self.relevant_ratio:
+            words.insert(1, rng.choice(RELEVANT_WORDS))
+        return {
+            "id": story_id,
+            "type": "story",
+            "title": " ".join(words),
+            "url": f"https://news.example.com/{story_id}",
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_config(self) -> list[dict]:
+        return [
+            {"name": f"Feed {i}", "url": f"{self.base_url}/feeds/{i}.xml"}
+            for i in range(self.feeds)
+        ]
+
+    @property
+    def hn_base_url(self) -> str:
+        return f"{self.base_url}/v0/"
+
+    @property
+    def title_prefetch_url(self) -> str:
+        return f"{self.base_url}/algolia/search"
+
+    def start(self) -> "FakeServices":
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.services = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
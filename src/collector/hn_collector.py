@@ -1,13 +1,35 @@
+import asyncio
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
 import httpx
 
-from src.collector.rss_collector import Article
+from src.collector.keyword_matcher import KeywordMatcher
+from src.collector.retry import RetryPolicy, request_with_retry, request_with_retry_async
+from src.metrics import metrics
+from src.models import Article
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://hacker-news.firebaseio.com/v0/"
 
+TITLE_PREFETCH_URL = "https://hn.algolia.com/api/v1/search"
+
+TITLE_PREFETCH_CHUNK_SIZE = 50
+
+SOURCE_KEY = "hacker_news"
+
+SEEN_RETENTION_DAYS = 30.0
+
+_FETCH_FAILED = object()
+
+
+@dataclass
+class StoryResult:
+    articles: list[Article] = field(default_factory=list)
+    seen_ids: list[int] = field(default_factory=list)
+
 
 class HnCollector:
     def __init__(
@@ -15,26 +37,49 @@ class HnCollector:
         keywords: list[str] | None = None,
         max_stories: int = 30,
         base_url: str = BASE_URL,
+        concurrency: int = 10,
+        timeout: float = 10.0,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+        transport: httpx.AsyncBaseTransport | None = None,
+        seen_store=None,
+        title_prefetch_url: str | None = None,
     ):
         self.keywords = [kw.lower() for kw in (keywords or [])]
+        self.matcher = KeywordMatcher(self.keywords)
         self.max_stories = max_stories
         self.base_url = base_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retry_policy = RetryPolicy(retries, retry_backoff)
+        self.transport = transport
+        self.seen_store = seen_store
+        self.title_prefetch_url = title_prefetch_url
+        self.title_cache: dict[int, str] = {}
 
     def is_relevant(self, title: str) -> bool:
-        title_lower = title.lower()
-        return any(kw in title_lower for kw in self.keywords)
+        return self.matcher.matches(title)
 
-    def fetch_top_story_ids(self) -> list[int]:
-        response = httpx.get(f"{self.base_url}topstories.json")
+    def _on_retry(self, endpoint: str) -> Callable[[int], None]:
+        return lambda attempt: metrics.increment("hn_retries_total", endpoint=endpoint)
+
+    def _get_json_sync(self, endpoint: str, url: str):
+        def send() -> httpx.Response:
+            metrics.increment("hn_requests_total", endpoint=endpoint)
+            return httpx.get(url)
+
+        response = request_with_retry(send, self.retry_policy, self._on_retry(endpoint))
         response.raise_for_status()
-        ids = response.json()
+        return response.json()
+
+    def fetch_top_story_ids(self) -> list[int]:
+        ids = self._get_json_sync("topstories", f"{self.base_url}topstories.json")
         return ids[: self.max_stories]
 
     def fetch_story(self, story_id: int) -> Article | None:
-        response = httpx.get(f"{self.base_url}item/{story_id}.json")
-        response.raise_for_status()
-        data = response.json()
+        return self._to_article(self._get_json_sync("item", f"{self.base_url}item/{story_id}.json"))
 
+    def _to_article(self, data: dict | None) -> Article | None:
         if not data or data.get("type") != "story":
             return None
 
@@ -50,11 +95,145 @@ class HnCollector:
             published="",
         )
 
+    def _filter_unseen(self, ids: list[int]) -> list[int]:
+        if self.seen_store is None:
+            return ids
+        return self.seen_store.filter_unseen_items(SOURCE_KEY, ids)
+
+    def _mark_seen(self, ids: list[int]) -> None:
+        if self.seen_store is not None:
+            self.seen_store.mark_items_seen(SOURCE_KEY, ids)
+
+    def commit(self, result: StoryResult) -> None:
+        self._mark_seen(result.seen_ids)
+
     def fetch_relevant_stories(self) -> list[Article]:
-        ids = self.fetch_top_story_ids()
+        ids = self._filter_unseen(self.fetch_top_story_ids())
         articles = []
-        for story_id in ids:
-            article = self.fetch_story(story_id)
-            if article:
-                articles.append(article)
+        fetched = []
+        try:
+            for story_id in ids:
+                article = self.fetch_story(story_id)
+                fetched.append(story_id)
+                if article:
+                    articles.append(article)
+        finally:
+            self._mark_seen(fetched)
         return articles
+
+    def _make_async_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=limits,
+            transport=self.transport,
+        )
+
+    async def _get_json(self, client: httpx.AsyncClient, endpoint: str, path: str, **kwargs):
+        async def send() -> httpx.Response:
+            metrics.increment("hn_requests_total", endpoint=endpoint)
+            with metrics.timer("hn_request_seconds", endpoint=endpoint):
+                return await client.get(path, **kwargs)
+
+        try:
+            response = await request_with_retry_async(
+                send, self.retry_policy, self._on_retry(endpoint)
+            )
+            response.raise_for_status()
+        except httpx.HTTPError:
+            metrics.increment("hn_request_errors_total", endpoint=endpoint)
+            raise
+        return response.json()
+
+    async def fetch_top_story_ids_async(self, client: httpx.AsyncClient) -> list[int]:
+        ids = await self._get_json(client, "topstories", "topstories.json")
+        return ids[: self.max_stories]
+
+    async def _fetch_item_async(
+        self,
+        client: httpx.AsyncClient,
+        story_id: int,
+        semaphore: asyncio.Semaphore,
+    ):
+        async with semaphore:
+            try:
+                return await self._get_json(client, "item", f"item/{story_id}.json")
+            except httpx.HTTPError as e:
+                logger.warning("HNストーリー取得失敗: %s (%s)", story_id, e)
+                return _FETCH_FAILED
+
+    async def fetch_story_async(
+        self,
+        client: httpx.AsyncClient,
+        story_id: int,
+        semaphore: asyncio.Semaphore,
+    ) -> Article | None:
+        data = await self._fetch_item_async(client, story_id, semaphore)
+        return None if data is _FETCH_FAILED else self._to_article(data)
+
+    async def _prefetch_chunk(
+        self, client: httpx.AsyncClient, chunk: list[int], semaphore: asyncio.Semaphore
+    ) -> None:
+        tags = "story,(" + ",".join(f"story_{story_id}" for story_id in chunk) + ")"
+        async with semaphore:
+            try:
+                data = await self._get_json(
+                    client,
+                    "search",
+                    self.title_prefetch_url,
+                    params={"tags": tags, "hitsPerPage": len(chunk)},
+                )
+            except httpx.HTTPError as e:
+                logger.warning("HNタイトル事前取得失敗: %s", e)
+                return
+        for hit in data.get("hits", []):
+            self.title_cache[int(hit["objectID"])] = hit.get("title") or ""
+
+    async def prefetch_titles_async(
+        self, client: httpx.AsyncClient, ids: list[int]
+    ) -> dict[int, str]:
+        missing = [story_id for story_id in ids if story_id not in self.title_cache]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._prefetch_chunk(client, missing[i : i + TITLE_PREFETCH_CHUNK_SIZE], semaphore)
+                for i in range(0, len(missing), TITLE_PREFETCH_CHUNK_SIZE)
+            )
+        )
+        self.title_cache = {
+            story_id: self.title_cache[story_id] for story_id in ids if story_id in self.title_cache
+        }
+        return dict(self.title_cache)
+
+    async def fetch_story_result_async(self) -> StoryResult:
+        result = StoryResult()
+        async with self._make_async_client() as client:
+            ids = self._filter_unseen(await self.fetch_top_story_ids_async(client))
+            if self.title_prefetch_url:
+                titles = await self.prefetch_titles_async(client, ids)
+                irrelevant = {
+                    story_id for story_id, title in titles.items() if not self.is_relevant(title)
+                }
+                result.seen_ids.extend(story_id for story_id in ids if story_id in irrelevant)
+                ids = [story_id for story_id in ids if story_id not in irrelevant]
+            semaphore = asyncio.Semaphore(self.concurrency)
+            items = await asyncio.gather(
+                *(self._fetch_item_async(client, story_id, semaphore) for story_id in ids)
+            )
+        for story_id, data in zip(ids, items):
+            if data is _FETCH_FAILED:
+                continue
+            result.seen_ids.append(story_id)
+            article = self._to_article(data)
+            if article:
+                result.articles.append(article)
+        return result
+
+    async def fetch_relevant_stories_async(self) -> list[Article]:
+        result = await self.fetch_story_result_async()
+        self.commit(result)
+        return result.articles
@@ -0,0 +1,31 @@
+import re
+
+_WORD_CHAR = "A-Za-z0-9"
+_WORD_START = rf"(?:(?<![{_WORD_CHAR}])|(?-i:(?<=[a-z])(?=[A-Z])))"
+
+
+def _keyword_pattern(keyword: str) -> str:
+    words = keyword.split()
+    return r"[\s\-]+".join(re.escape(word) for word in words)
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: list[str]):
+        self.keywords = [kw for kw in dict.fromkeys(kw.strip().lower() for kw in keywords) if kw]
+        alternatives = "|".join(
+            _keyword_pattern(kw) for kw in sorted(self.keywords, key=len, reverse=True)
+        )
+        self._regex = (
+            re.compile(
+                rf"{_WORD_START}(?:{alternatives})(?:e?s)?(?![{_WORD_CHAR}])",
+                re.IGNORECASE,
+            )
+            if alternatives
+            else None
+        )
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def matches(self, text: str | None) -> bool:
+        return bool(self._regex and text and self._regex.search(text))
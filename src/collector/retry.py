@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import httpx
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    retries: int = 2
+    backoff: float = 0.5
+
+    def delay(self, attempt: int) -> float:
+        return self.backoff * 2**attempt
+
+    def should_retry(self, attempt: int, response: httpx.Response | None) -> bool:
+        if attempt >= self.retries:
+            return False
+        return response is None or response.status_code in RETRYABLE_STATUS_CODES
+
+
+def request_with_retry(
+    send: Callable[[], httpx.Response],
+    policy: RetryPolicy,
+    on_retry: Callable[[int], None] | None = None,
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        try:
+            response = send()
+        except httpx.TransportError:
+            if not policy.should_retry(attempt, None):
+                raise
+        else:
+            if not policy.should_retry(attempt, response):
+                return response
+        if on_retry is not None:
+            on_retry(attempt)
+        time.sleep(policy.delay(attempt))
+        attempt += 1
+
+
+async def request_with_retry_async(
+    send: Callable[[], Awaitable[httpx.Response]],
+    policy: RetryPolicy,
+    on_retry: Callable[[int], None] | None = None,
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        try:
+            response = await send()
+        except httpx.TransportError:
+            if not policy.should_retry(attempt, None):
+                raise
+        else:
+            if not policy.should_retry(attempt, response):
+                return response
+        if on_retry is not None:
+            on_retry(attempt)
+        await asyncio.sleep(policy.delay(attempt))
+        attempt += 1
@@ -1,19 +1,59 @@
+import argparse
+import calendar
 import json
 import logging
-from dataclasses import dataclass
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
-import feedparser
+import httpx
+
+from src.collector.keyword_matcher import KeywordMatcher
+from src.collector.retry import RetryPolicy, request_with_retry
+from src.metrics import metrics
+from src.models import Article
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
-class Article:
-    title: str
+class FeedResult:
+    name: str
     url: str
-    summary: str
-    source: str
-    published: str
+    articles: list[Article] = field(default_factory=list)
+    valid: bool = False
+    not_modified: bool = False
+    entry_count: int = 0
+    status: int | None = None
+    latency: float = 0.0
+    bytes: int = 0
+    error: str | None = None
+    cache_entry: dict | None = None
+    watermark: dict | None = None
+
+    def health(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "valid": self.valid,
+            "entry_count": self.entry_count,
+            "status": self.status,
+            "latency": round(self.latency, 4),
+            "bytes": self.bytes,
+            "error": self.error,
+        }
+
+
+def _entry_guid(entry) -> str:
+    return entry.get("id", "") or entry.get("link", "")
+
+
+def _entry_timestamp(entry) -> int | None:
+    parsed_time = entry.get("published_parsed") or entry.get("updated_parsed")
+    return calendar.timegm(parsed_time) if parsed_time else None
 
 
 def load_feed_config(config_path: str) -> dict:
@@ -22,16 +62,155 @@ def load_feed_config(config_path: str) -> dict:
 
 
 class RssCollector:
-    def fetch_feed(self, feed_url: str, source_name: str) -> list[Article]:
-        parsed = feedparser.parse(feed_url)
+    def __init__(
+        self,
+        max_workers: int = 8,
+        timeout: float = 10.0,
+        cache_path: str | None = None,
+        transport: httpx.BaseTransport | None = None,
+        watermarks=None,
+        matcher: KeywordMatcher | None = None,
+        retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
+        self.max_workers = max_workers
+        self.retry_policy = RetryPolicy(retries, retry_backoff)
+        self.matcher = matcher
+        self.cache_path = cache_path
+        self.watermarks = watermarks
+        self.feed_cache: dict[str, dict] = self._load_cache()
+        self._cache_lock = threading.Lock()
+        self.client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_workers, max_keepalive_connections=max_workers),
+            follow_redirects=True,
+            transport=transport,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _load_cache(self) -> dict[str, dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        with open(self.cache_path) as f:
+            return json.load(f)
+
+    def save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            data = json.dumps(self.feed_cache, ensure_ascii=False, indent=2)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.cache_path)
+
+    def _conditional_headers(self, feed_url: str) -> dict[str, str]:
+        cached = self.feed_cache.get(feed_url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def _update_cache(self, feed_url: str, entry: dict) -> None:
+        with self._cache_lock:
+            if entry["etag"] or entry["last_modified"]:
+                self.feed_cache[feed_url] = entry
+            else:
+                self.feed_cache.pop(feed_url, None)
+
+    def commit(self, result: FeedResult) -> None:
+        if result.cache_entry is not None:
+            self._update_cache(result.url, result.cache_entry)
+        if result.watermark is not None and self.watermarks is not None:
+            self.watermarks.set_watermark(result.url, result.watermark)
+
+    def fetch_feed_result(
+        self, feed_url: str, source_name: str, use_cache: bool = True
+    ) -> FeedResult:
+        result = self._fetch_feed_result(feed_url, source_name, use_cache)
+        metrics.observe("rss_fetch_seconds", result.latency, feed=source_name)
+        metrics.increment("rss_fetch_bytes_total", result.bytes, feed=source_name)
+        metrics.increment("rss_articles_total", len(result.articles), feed=source_name)
+        if result.error:
+            metrics.increment("rss_fetch_errors_total", feed=source_name)
+        elif result.not_modified:
+            metrics.increment("rss_not_modified_total", feed=source_name)
+        return result
+
+    def _fetch_feed_result(self, feed_url: str, source_name: str, use_cache: bool) -> FeedResult:
+        result = FeedResult(name=source_name, url=feed_url)
+        headers = self._conditional_headers(feed_url) if use_cache else {}
+        started = time.perf_counter()
+        try:
+            response = request_with_retry(
+                lambda: self.client.get(feed_url, headers=headers),
+                self.retry_policy,
+                lambda attempt: metrics.increment("rss_retries_total", feed=source_name),
+            )
+        except httpx.HTTPError as e:
+            result.latency = time.perf_counter() - started
+            result.error = str(e) or type(e).__name__
+            logger.warning("フィード取得失敗: %s (%s) %s", source_name, feed_url, result.error)
+            return result
+        result.latency = time.perf_counter() - started
+        result.status = response.status_code
+        result.bytes = len(response.content)
+
+        if response.status_code == 304:
+            logger.debug("フィード未更新: %s (%s)", source_name, feed_url)
+            result.valid = True
+            result.not_modified = True
+            result.entry_count = self.feed_cache.get(feed_url, {}).get("entry_count", 0)
+            return result
+
+        if response.is_error:
+            result.error = f"HTTP {response.status_code}"
+            logger.warning(
+                "フィード取得失敗: %s (%s) HTTP %s", source_name, feed_url, response.status_code
+            )
+            return result
+
+        import feedparser
+
+        parsed = feedparser.parse(response.content, response_headers=dict(response.headers))
+        result.entry_count = len(parsed.entries)
+        result.valid = bool(parsed.entries) and not parsed.bozo
 
         if parsed.bozo and not parsed.entries:
+            result.error = str(parsed.get("bozo_exception", "")) or "parse error"
             logger.warning("フィード取得失敗: %s (%s)", source_name, feed_url)
-            return []
+            return result
 
-        articles = []
+        if use_cache:
+            result.cache_entry = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "entry_count": result.entry_count,
+            }
+
+        use_watermark = use_cache and self.watermarks is not None
+        watermark = (self.watermarks.get_watermark(feed_url) if use_watermark else None) or {}
+        watermark_guid = watermark.get("guid")
+        watermark_time = watermark.get("published_at")
+        newest_time = watermark_time
         for entry in parsed.entries:
-            articles.append(
+            guid = _entry_guid(entry)
+            timestamp = _entry_timestamp(entry)
+            if guid and guid == watermark_guid:
+                break
+            if timestamp is not None and watermark_time is not None and timestamp < watermark_time:
+                continue
+            if timestamp is not None:
+                newest_time = timestamp if newest_time is None else max(newest_time, timestamp)
+            if self.matcher and not self.matcher.matches(
+                f"{entry.get('title', '')} {entry.get('summary', '')}"
+            ):
+                continue
+            result.articles.append(
                 Article(
                     title=entry.get("title", ""),
                     url=entry.get("link", ""),
@@ -40,26 +219,56 @@ class RssCollector:
                     published=entry.get("published", ""),
                 )
             )
-        return articles
 
-    def fetch_all_feeds(self, feeds: list[dict]) -> list[Article]:
-        all_articles = []
-        for feed in feeds:
-            articles = self.fetch_feed(feed["url"], feed["name"])
-            all_articles.extend(articles)
-        return all_articles
+        if use_watermark and parsed.entries:
+            result.watermark = {"guid": _entry_guid(parsed.entries[0]), "published_at": newest_time}
+        return result
 
-    def validate_feed_urls(self, feeds: list[dict]) -> list[dict]:
-        results = []
-        for feed in feeds:
-            parsed = feedparser.parse(feed["url"])
-            valid = bool(parsed.entries) and not parsed.bozo
-            results.append(
-                {
-                    "name": feed["name"],
-                    "url": feed["url"],
-                    "valid": valid,
-                    "entry_count": len(parsed.entries),
-                }
+    def fetch_feed(self, feed_url: str, source_name: str) -> list[Article]:
+        result = self.fetch_feed_result(feed_url, source_name)
+        self.commit(result)
+        return result.articles
+
+    def fetch_feed_results(self, feeds: list[dict], use_cache: bool = True) -> list[FeedResult]:
+        if not feeds:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(feeds))) as executor:
+            results = list(
+                executor.map(
+                    lambda feed: self.fetch_feed_result(feed["url"], feed["name"], use_cache),
+                    feeds,
+                )
             )
+        if use_cache:
+            for result in results:
+                self.commit(result)
+            self.save_cache()
         return results
+
+    def fetch_all_feeds(self, feeds: list[dict]) -> list[Article]:
+        results = self.fetch_feed_results(feeds)
+        return [article for result in results for article in result.articles]
+
+    def validate_feed_urls(self, feeds: list[dict]) -> list[dict]:
+        return [result.health() for result in self.fetch_feed_results(feeds, use_cache=False)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="RSSフィードのヘルスチェック")
+    parser.add_argument("--config", default="config/feeds.json")
+    parser.add_argument("--max-workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    feeds = load_feed_config(args.config)["rss_feeds"]
+    collector = RssCollector(max_workers=args.max_workers)
+    try:
+        results = collector.validate_feed_urls(feeds)
+    finally:
+        collector.close()
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    return 0 if all(result["valid"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+
+ARCHIVE_PREFIX = "articles-"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+_ARCHIVE_NAME_RE = re.compile(rf"^{ARCHIVE_PREFIX}(\d{{4}}-\d{{2}}){re.escape(ARCHIVE_SUFFIX)}$")
+
+
+def archive_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, f"{ARCHIVE_PREFIX}{month}{ARCHIVE_SUFFIX}")
+
+
+def append_records(archive_dir: str, records: Iterable[dict]) -> dict[str, int]:
+    by_month: dict[str, list[dict]] = {}
+    for record in records:
+        by_month.setdefault(record["created_at"][:7], []).append(record)
+    os.makedirs(archive_dir, exist_ok=True)
+    for month, rows in sorted(by_month.items()):
+        with open(archive_path(archive_dir, month), "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False).encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+    return {month: len(rows) for month, rows in by_month.items()}
+
+
+def archive_months(archive_dir: str) -> list[str]:
+    if not os.path.isdir(archive_dir):
+        return []
+    months = []
+    for name in os.listdir(archive_dir):
+        match = _ARCHIVE_NAME_RE.match(name)
+        if match:
+            months.append(match.group(1))
+    return sorted(months)
+
+
+def iter_archive(
+    archive_dir: str, start_month: str | None = None, end_month: str | None = None
+) -> Iterator[dict]:
+    for month in archive_months(archive_dir):
+        if start_month and month < start_month or end_month and month > end_month:
+            continue
+        with gzip.open(archive_path(archive_dir, month), "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
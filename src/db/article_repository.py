@@ -1,6 +1,26 @@
+import argparse
+import json
+import re
 import sqlite3
+import sys
+import threading
+from collections.abc import Callable, Iterator, Sequence
 
-from src.collector.rss_collector import Article
+from src.db.archive import append_records, iter_archive
+from src.db.connection import connect
+from src.db.dedup import (
+    BAND_COUNT,
+    SIMILARITY_THRESHOLD,
+    Fingerprint,
+    canonicalize_url,
+    estimate_similarity,
+    fingerprint,
+    pack_signature,
+    unpack_signature,
+    url_hash,
+)
+from src.metrics import metrics
+from src.models import Article
 
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS articles (
@@ -15,65 +35,835 @@ CREATE TABLE IF NOT EXISTS articles (
 )
 """
 
+CREATE_FINGERPRINTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS article_fingerprints (
+    article_id INTEGER PRIMARY KEY REFERENCES articles (id) ON DELETE CASCADE,
+    canonical_url TEXT NOT NULL,
+    signature BLOB,
+    band0 INTEGER,
+    band1 INTEGER,
+    band2 INTEGER,
+    band3 INTEGER,
+    band4 INTEGER,
+    band5 INTEGER,
+    band6 INTEGER,
+    band7 INTEGER
+)
+"""
+
+BAND_COLUMNS = [f"band{i}" for i in range(BAND_COUNT)]
+
+INSERT_FINGERPRINT_SQL = (
+    "INSERT OR IGNORE INTO article_fingerprints "
+    f"(article_id, canonical_url, signature, {', '.join(BAND_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (BAND_COUNT + 3))})"
+)
+
+FIND_CANDIDATES_SQL = "SELECT article_id, signature FROM article_fingerprints WHERE " + " OR ".join(
+    f"{column} = ?" for column in BAND_COLUMNS
+)
+
+
+CREATE_FTS_TABLE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title,
+    summary,
+    source,
+    content = 'articles',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+)
+"""
+
+CREATE_FTS_TRIGGERS_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN "
+    "INSERT INTO articles_fts (rowid, title, summary, source) "
+    "VALUES (new.id, new.title, new.summary, new.source); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN "
+    "INSERT INTO articles_fts (articles_fts, rowid, title, summary, source) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.source); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_fts_update "
+    "AFTER UPDATE OF title, summary, source ON articles BEGIN "
+    "INSERT INTO articles_fts (articles_fts, rowid, title, summary, source) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.source); "
+    "INSERT INTO articles_fts (rowid, title, summary, source) "
+    "VALUES (new.id, new.title, new.summary, new.source); END",
+)
+
+MIN_MATCH_TERM_LENGTH = 3
+
+SNIPPET_TOKENS = 32
+
+SEARCH_COLUMNS = "a.id, a.title, a.url, a.source, a.created_at"
+
+SEARCH_TERM_DRIVE_LIMIT = 1000
+
+_SEARCH_TERM_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+INSERT_SEARCH_TERM_SQL = (
+    "INSERT OR IGNORE INTO article_search_terms (term, article_id) VALUES (?, ?)"
+)
+
+
+def _search_terms(*texts: str | None) -> set[str]:
+    return {
+        word.lower()
+        for text in texts
+        if text
+        for word in _SEARCH_TERM_RE.findall(text)
+        if len(word) < MIN_MATCH_TERM_LENGTH
+    }
+
+
+def _is_indexed_term(term: str) -> bool:
+    return _SEARCH_TERM_RE.fullmatch(term) is not None
+
+
+def _search_term_params(rows) -> list[tuple[str, int]]:
+    return [
+        (term, row["id"])
+        for row in rows
+        for term in _search_terms(row["title"], row["summary"], row["source"])
+    ]
+
+
+def _backfill_search_terms(conn: sqlite3.Connection) -> None:
+    cursor = conn.execute("SELECT id, title, summary, source FROM articles ORDER BY id")
+    while rows := cursor.fetchmany(1000):
+        conn.executemany(INSERT_SEARCH_TERM_SQL, _search_term_params(rows))
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _find_term(text: str, term: str) -> tuple[int, int] | None:
+    if _is_indexed_term(term):
+        for match in _SEARCH_TERM_RE.finditer(text):
+            if match.group().lower() == term.lower():
+                return match.span()
+        return None
+    start = text.lower().find(term.lower())
+    return (start, start + len(term)) if start >= 0 else None
+
+
+def _like_snippet(text: str | None, terms: list[str], width: int = SNIPPET_TOKENS) -> str:
+    text = text or ""
+    for term in terms:
+        span = _find_term(text, term)
+        if span is None:
+            continue
+        start, end = span
+        head = max(start - width, 0)
+        tail = min(end + width, len(text))
+        return (
+            ("…" if head else "")
+            + f"{text[head:start]}[{text[start:end]}]{text[end:tail]}"
+            + ("…" if tail < len(text) else "")
+        )
+    return text[: width * 2] + ("…" if len(text) > width * 2 else "")
+
+
+def _fingerprint_params(article_id: int, fp: Fingerprint, bands: tuple | None = None) -> tuple:
+    signature = pack_signature(fp.signature) if fp.signature is not None else None
+    return (article_id, fp.canonical_url, signature, *(bands or fp.bands()))
+
+
+def _article_factory(cursor: sqlite3.Cursor, row: tuple) -> Article:
+    return Article(*row[:6], bool(row[6]), row[7])
+
+
+def _article_keyset(article: Article) -> tuple[str, int]:
+    return article.created_at, article.id
+
+
+def _row_keyset(row: sqlite3.Row) -> tuple[str, int]:
+    return row["created_at"], row["id"]
+
+
+def _backfill_fingerprints(conn: sqlite3.Connection) -> None:
+    cursor = conn.execute("SELECT id, url, title, summary FROM articles ORDER BY id")
+    while rows := cursor.fetchmany(1000):
+        conn.executemany(
+            INSERT_FINGERPRINT_SQL,
+            [
+                _fingerprint_params(
+                    row["id"], fingerprint(row["url"], row["title"], row["summary"])
+                )
+                for row in rows
+            ],
+        )
+
+
+MIGRATIONS: list[tuple[str | Callable[[sqlite3.Connection], None], ...]] = [
+    (CREATE_TABLE_SQL,),
+    (
+        "CREATE INDEX IF NOT EXISTS idx_articles_created_at ON articles (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_unsummarized "
+        "ON articles (created_at, id) WHERE is_summarized = 0",
+    ),
+    (
+        CREATE_FINGERPRINTS_TABLE_SQL,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_fingerprints_canonical_url "
+        "ON article_fingerprints (canonical_url)",
+        *(
+            f"CREATE INDEX IF NOT EXISTS idx_fingerprints_{column} "
+            f"ON article_fingerprints ({column}) WHERE {column} IS NOT NULL"
+            for column in BAND_COLUMNS
+        ),
+        _backfill_fingerprints,
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS source_watermarks ("
+        "source TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+        "CREATE TABLE IF NOT EXISTS seen_items ("
+        "source TEXT NOT NULL, item_id TEXT NOT NULL, "
+        "seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+        "PRIMARY KEY (source, item_id)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_seen_items_seen_at ON seen_items (seen_at)",
+    ),
+    (
+        "ALTER TABLE articles ADD COLUMN is_published INTEGER DEFAULT 0",
+        "ALTER TABLE articles ADD COLUMN published_at TIMESTAMP",
+        "CREATE INDEX IF NOT EXISTS idx_articles_unpublished ON articles (created_at, id) "
+        "WHERE is_summarized = 1 AND is_published = 0",
+    ),
+    (
+        CREATE_FTS_TABLE_SQL,
+        *CREATE_FTS_TRIGGERS_SQL,
+        "INSERT INTO articles_fts (articles_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 2.0)')",
+        "INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')",
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS source_schedules ("
+        "source TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS archived_urls ("
+        "url_hash INTEGER PRIMARY KEY, "
+        "archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) WITHOUT ROWID",
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS article_search_terms ("
+        "term TEXT NOT NULL, article_id INTEGER NOT NULL, "
+        "PRIMARY KEY (term, article_id)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS idx_search_terms_article_id "
+        "ON article_search_terms (article_id)",
+        _backfill_search_terms,
+    ),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+ARTICLE_COLUMNS = (
+    "id",
+    "title",
+    "url",
+    "summary",
+    "source",
+    "published",
+    "is_summarized",
+    "is_published",
+    "published_at",
+    "created_at",
+)
+
+ARTICLE_SELECT = "title, url, summary, source, published, id, is_summarized, created_at"
+
+DEFAULT_PAGE_SIZE = 500
+
+SQLITE_MAX_PARAMS = 500
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+DEFAULT_RETENTION_DAYS = 90
+
+DEFAULT_ARCHIVE_DIR = "data/archive"
+
+INSERT_SQL = (
+    "INSERT INTO articles (title, url, summary, source, published) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(url) DO NOTHING"
+)
+
 
 class ArticleRepository:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._conn = connect(db_path)
+        self._lock = threading.RLock()
         self._init_db()
 
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(CREATE_TABLE_SQL)
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                self._conn.execute("BEGIN")
+                with self._conn:
+                    for step in MIGRATIONS[target - 1]:
+                        if callable(step):
+                            step(self._conn)
+                        else:
+                            self._conn.execute(step)
+                    self._conn.execute(f"PRAGMA user_version = {target}")
+
+    def schema_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def save(self, article: Article) -> bool:
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                params = (
-                    article.title,
-                    article.url,
-                    article.summary,
-                    article.source,
-                    article.published,
+        return self.save_many([article]) == 1
+
+    def _find_duplicate_id(self, fp: Fingerprint) -> int | None:
+        row = self._conn.execute(
+            "SELECT article_id FROM article_fingerprints WHERE canonical_url = ?",
+            (fp.canonical_url,),
+        ).fetchone()
+        if row is not None:
+            return row["article_id"]
+        if fp.signature is None:
+            return None
+        for candidate in self._conn.execute(FIND_CANDIDATES_SQL, fp.bands()):
+            similarity = estimate_similarity(unpack_signature(candidate["signature"]), fp.signature)
+            if similarity >= SIMILARITY_THRESHOLD:
+                return candidate["article_id"]
+        return None
+
+    def find_duplicate(self, article: Article) -> dict | None:
+        fp = fingerprint(article.url, article.title, article.summary)
+        with self._lock:
+            article_id = self._find_duplicate_id(fp)
+            if article_id is None:
+                return None
+            row = self._conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,))
+            return dict(row.fetchone())
+
+    def _select_in(self, sql: str, keys: list) -> Iterator[sqlite3.Row]:
+        for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+            chunk = keys[start : start + SQLITE_MAX_PARAMS]
+            yield from self._conn.execute(f"{sql} IN ({', '.join('?' * len(chunk))})", chunk)
+
+    def _band_candidates(self, bands: list[tuple]) -> dict[tuple[int, int], list[tuple]]:
+        signatures: dict[int, tuple] = {}
+        candidates: dict[tuple[int, int], list[tuple]] = {}
+        for index, column in enumerate(BAND_COLUMNS):
+            values = list({band[index] for band in bands if band[index] is not None})
+            rows = self._select_in(
+                f"SELECT article_id, signature, {column} FROM article_fingerprints WHERE {column}",
+                values,
+            )
+            for article_id, signature, value in rows:
+                if article_id not in signatures:
+                    signatures[article_id] = unpack_signature(signature)
+                candidates.setdefault((index, value), []).append(signatures[article_id])
+        return candidates
+
+    def save_new(self, articles: list[Article]) -> list[Article]:
+        with metrics.timer("db_fingerprint_seconds"):
+            fingerprints = [
+                fingerprint(article.url, article.title, article.summary) for article in articles
+            ]
+            bands = [fp.bands() for fp in fingerprints]
+        url_duplicates = near_duplicates = 0
+        with metrics.timer("db_insert_seconds"), self._lock, self._conn:
+            canonical_urls = list({fp.canonical_url for fp in fingerprints})
+            known_urls = {
+                row[0]
+                for row in self._select_in(
+                    "SELECT canonical_url FROM article_fingerprints WHERE canonical_url",
+                    canonical_urls,
                 )
-                conn.execute(
-                    "INSERT INTO articles (title, url, summary, source, published) "
-                    "VALUES (?, ?, ?, ?, ?)",
-                    params,
+            }
+            known_urls.update(
+                row[0]
+                for row in self._select_in(
+                    "SELECT url FROM articles WHERE url", [article.url for article in articles]
                 )
-            return True
-        except sqlite3.IntegrityError:
-            return False
+            )
+            hashes = {url: url_hash(url) for url in canonical_urls}
+            archived = {
+                row[0]
+                for row in self._select_in(
+                    "SELECT url_hash FROM archived_urls WHERE url_hash", list(hashes.values())
+                )
+            }
+            candidates = self._band_candidates(bands)
+
+            accepted = []
+            for article, fp, article_bands in zip(articles, fingerprints, bands):
+                if (
+                    fp.canonical_url in known_urls
+                    or article.url in known_urls
+                    or hashes[fp.canonical_url] in archived
+                ):
+                    url_duplicates += 1
+                    continue
+                known_urls.update((fp.canonical_url, article.url))
+                if fp.signature is not None:
+                    keys = list(enumerate(article_bands))
+                    if any(
+                        estimate_similarity(signature, fp.signature) >= SIMILARITY_THRESHOLD
+                        for key in keys
+                        for signature in candidates.get(key, ())
+                    ):
+                        near_duplicates += 1
+                        continue
+                    for key in keys:
+                        candidates.setdefault(key, []).append(fp.signature)
+                accepted.append((article, fp, article_bands))
+
+            self._conn.executemany(
+                INSERT_SQL,
+                [
+                    (article.title, article.url, article.summary, article.source, article.published)
+                    for article, _, _ in accepted
+                ],
+            )
+            ids = {
+                row["url"]: row["id"]
+                for row in self._select_in(
+                    "SELECT id, url FROM articles WHERE url",
+                    [article.url for article, _, _ in accepted],
+                )
+            }
+            self._conn.executemany(
+                INSERT_FINGERPRINT_SQL,
+                [
+                    _fingerprint_params(ids[article.url], fp, article_bands)
+                    for article, fp, article_bands in accepted
+                ],
+            )
+            self._conn.executemany(
+                INSERT_SEARCH_TERM_SQL,
+                [
+                    (term, ids[article.url])
+                    for article, _, _ in accepted
+                    for term in _search_terms(article.title, article.summary, article.source)
+                ],
+            )
+        inserted = [article for article, _, _ in accepted]
+        metrics.increment("db_articles_inserted_total", len(inserted))
+        metrics.increment("db_articles_duplicate_total", url_duplicates + near_duplicates)
+        metrics.increment("db_articles_url_duplicate_total", url_duplicates)
+        metrics.increment("db_articles_near_duplicate_total", near_duplicates)
+        return inserted
 
     def save_many(self, articles: list[Article]) -> int:
-        count = 0
-        for article in articles:
-            if self.save(article):
-                count += 1
-        return count
+        return len(self.save_new(articles))
 
     def exists(self, url: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT 1 FROM articles WHERE url = ?", (url,))
+        canonical_url = canonicalize_url(url)
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT 1 FROM articles WHERE url = ? UNION ALL "
+                "SELECT 1 FROM article_fingerprints WHERE canonical_url = ? UNION ALL "
+                "SELECT 1 FROM archived_urls WHERE url_hash = ? LIMIT 1",
+                (url, canonical_url, url_hash(canonical_url)),
+            )
             return cursor.fetchone() is not None
 
-    def get_all(self) -> list[dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM articles ORDER BY created_at DESC")
-            return [dict(row) for row in cursor.fetchall()]
-
-    def get_unsummarized(self) -> list[dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM articles WHERE is_summarized = 0 ORDER BY created_at DESC"
+    def _iter_pages(
+        self,
+        where: str | None,
+        query_columns: str,
+        row_factory: Callable,
+        keyset: Callable,
+        limit: int | None,
+        page_size: int,
+        after: tuple[str, int] | None,
+    ) -> Iterator:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            conditions = [where] if where else []
+            params: list = []
+            if after is not None:
+                conditions.append("(created_at, id) < (?, ?)")
+                params.extend(after)
+            sql = f"SELECT {query_columns} FROM articles"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+            params.append(size)
+
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.row_factory = row_factory
+                rows = cursor.execute(sql, params).fetchall()
+            yield from rows
+            if len(rows) < size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            after = keyset(rows[-1])
+
+    def _iter_rows(
+        self,
+        where: str | None,
+        columns: Sequence[str] | None,
+        limit: int | None,
+        page_size: int,
+        after: tuple[str, int] | None,
+    ) -> Iterator[dict]:
+        selected = list(columns or ARTICLE_COLUMNS)
+        unknown = set(selected) - set(ARTICLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"unknown columns: {sorted(unknown)}")
+        query_columns = ", ".join(dict.fromkeys([*selected, "created_at", "id"]))
+        rows = self._iter_pages(
+            where, query_columns, sqlite3.Row, _row_keyset, limit, page_size, after
+        )
+        for row in rows:
+            yield {column: row[column] for column in selected}
+
+    def _iter_articles(
+        self,
+        where: str | None,
+        limit: int | None,
+        page_size: int,
+        after: tuple[str, int] | None,
+    ) -> Iterator[Article]:
+        return self._iter_pages(
+            where, ARTICLE_SELECT, _article_factory, _article_keyset, limit, page_size, after
+        )
+
+    def iter_all(
+        self,
+        columns: Sequence[str] | None = None,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[dict]:
+        return self._iter_rows(None, columns, limit, page_size, after)
+
+    def iter_unsummarized(
+        self,
+        columns: Sequence[str] | None = None,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[dict]:
+        return self._iter_rows("is_summarized = 0", columns, limit, page_size, after)
+
+    def iter_unpublished(
+        self,
+        columns: Sequence[str] | None = None,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[dict]:
+        return self._iter_rows(
+            "is_summarized = 1 AND is_published = 0", columns, limit, page_size, after
+        )
+
+    def iter_articles(
+        self,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[Article]:
+        return self._iter_articles(None, limit, page_size, after)
+
+    def iter_unsummarized_articles(
+        self,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[Article]:
+        return self._iter_articles("is_summarized = 0", limit, page_size, after)
+
+    def iter_unpublished_articles(
+        self,
+        limit: int | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[Article]:
+        return self._iter_articles(
+            "is_summarized = 1 AND is_published = 0", limit, page_size, after
+        )
+
+    def get_all(self, limit: int | None = None, columns: Sequence[str] | None = None) -> list[dict]:
+        return list(self.iter_all(columns=columns, limit=limit))
+
+    def get_unsummarized(
+        self, limit: int | None = None, columns: Sequence[str] | None = None
+    ) -> list[dict]:
+        return list(self.iter_unsummarized(columns=columns, limit=limit))
+
+    def get_unpublished(
+        self, limit: int | None = None, columns: Sequence[str] | None = None
+    ) -> list[dict]:
+        return list(self.iter_unpublished(columns=columns, limit=limit))
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[dict]:
+        terms = query.replace('"', " ").split()
+        if not terms:
+            return []
+        match_terms = [term for term in terms if len(term) >= MIN_MATCH_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < MIN_MATCH_TERM_LENGTH]
+        indexed_terms = list({term.lower() for term in short_terms if _is_indexed_term(term)})
+        like_terms = [term for term in short_terms if not _is_indexed_term(term)]
+
+        conditions: list[str] = []
+        params: list = []
+        if match_terms:
+            sql = (
+                f"SELECT {SEARCH_COLUMNS}, "
+                f"snippet(articles_fts, -1, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet, "
+                "rank AS score FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid"
             )
-            return [dict(row) for row in cursor.fetchall()]
+            conditions.append("articles_fts MATCH ?")
+            params.append(" ".join(f'"{term}"' for term in match_terms))
+            order = "rank"
+        else:
+            sql = f"SELECT {SEARCH_COLUMNS}, a.summary AS snippet, NULL AS score FROM articles a"
+            order = "a.created_at DESC, a.id DESC"
+        driver = None
+        if indexed_terms and not match_terms:
+            with self._lock:
+                driver = self._search_term_driver(indexed_terms)
+        for term in indexed_terms:
+            if term == driver:
+                conditions.append(
+                    "a.id IN (SELECT article_id FROM article_search_terms WHERE term = ?)"
+                )
+            else:
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM article_search_terms "
+                    "WHERE term = ? AND article_id = a.id)"
+                )
+            params.append(term)
+        for term in like_terms:
+            conditions.append(
+                "(a.title LIKE ? ESCAPE '\\' OR a.summary LIKE ? ESCAPE '\\' "
+                "OR a.source LIKE ? ESCAPE '\\')"
+            )
+            params.extend([_like_pattern(term)] * 3)
+        sql += f" WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = [dict(row) for row in rows]
+        if not match_terms:
+            for result in results:
+                result["snippet"] = _like_snippet(result["snippet"], short_terms)
+        return results
+
+    def _search_term_driver(self, terms: list[str]) -> str | None:
+        counts = {
+            term: self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM article_search_terms WHERE term = ? LIMIT ?)",
+                (term, SEARCH_TERM_DRIVE_LIMIT),
+            ).fetchone()[0]
+            for term in terms
+        }
+        rarest = min(counts, key=counts.get)
+        return rarest if counts[rarest] < SEARCH_TERM_DRIVE_LIMIT else None
+
+    def rebuild_search_index(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+            self._conn.execute("DELETE FROM article_search_terms")
+            _backfill_search_terms(self._conn)
+
+    def _reindex_search_terms(self, urls: list[str]) -> None:
+        rows = list(
+            self._select_in("SELECT id, title, summary, source FROM articles WHERE url", urls)
+        )
+        self._conn.executemany(
+            "DELETE FROM article_search_terms WHERE article_id = ?", [(row["id"],) for row in rows]
+        )
+        self._conn.executemany(INSERT_SEARCH_TERM_SQL, _search_term_params(rows))
 
     def update_summary(self, url: str, summary: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("UPDATE articles SET summary = ? WHERE url = ?", (summary, url))
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET summary = ? WHERE url = ?", (summary, url))
+            self._reindex_search_terms([url])
 
     def mark_as_summarized(self, url: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("UPDATE articles SET is_summarized = 1 WHERE url = ?", (url,))
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET is_summarized = 1 WHERE url = ?", (url,))
+
+    def save_summaries(self, results: list[dict]) -> int:
+        params = [
+            (result["summary"], result["url"])
+            for result in results
+            if not result.get("error") and result.get("summary") is not None
+        ]
+        if not params:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "UPDATE articles SET summary = ?, is_summarized = 1 WHERE url = ?", params
+            )
+            self._reindex_search_terms([url for _, url in params])
+            return cursor.rowcount
+
+    def mark_as_published(self, urls: list[str]) -> int:
+        params = [(url,) for url in dict.fromkeys(urls)]
+        if not params:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "UPDATE articles SET is_published = 1, published_at = CURRENT_TIMESTAMP "
+                "WHERE url = ? AND is_published = 0",
+                params,
+            )
+            return cursor.rowcount
+
+    def archive_older_than(
+        self, days: float, archive_dir: str, batch_size: int = DEFAULT_PAGE_SIZE
+    ) -> int:
+        archived = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(ARTICLE_COLUMNS)} FROM articles "
+                    "WHERE created_at < datetime('now', ?) ORDER BY created_at, id LIMIT ?",
+                    (f"-{days} days", batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                append_records(archive_dir, [dict(row) for row in rows])
+                ids = [(row["id"],) for row in rows]
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO archived_urls (url_hash) VALUES (?)",
+                        [(url_hash(canonicalize_url(row["url"])),) for row in rows],
+                    )
+                    self._conn.executemany(
+                        "DELETE FROM article_fingerprints WHERE article_id = ?", ids
+                    )
+                    self._conn.executemany(
+                        "DELETE FROM article_search_terms WHERE article_id = ?", ids
+                    )
+                    self._conn.executemany("DELETE FROM articles WHERE id = ?", ids)
+            archived += len(rows)
+        metrics.increment("db_articles_archived_total", archived)
+        return archived
+
+    def compact(self) -> None:
+        with self._lock:
+            mode = self._conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode != AUTO_VACUUM_INCREMENTAL:
+                self._conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+                self._conn.execute("VACUUM")
+            else:
+                self._conn.executescript("PRAGMA incremental_vacuum;")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get_watermark(self, source: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM source_watermarks WHERE source = ?", (source,)
+            ).fetchone()
+        return json.loads(row["value"]) if row else None
+
+    def set_watermark(self, source: str, value: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO source_watermarks (source, value) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET "
+                "value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                (source, json.dumps(value)),
+            )
+
+    def get_schedules(self) -> dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT source, value FROM source_schedules").fetchall()
+        return {row["source"]: json.loads(row["value"]) for row in rows}
+
+    def set_schedule(self, source: str, value: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO source_schedules (source, value) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET "
+                "value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                (source, json.dumps(value)),
+            )
+
+    def filter_unseen_items(self, source: str, item_ids: list) -> list:
+        seen = set()
+        keys = [str(item_id) for item_id in item_ids]
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                chunk = keys[start : start + SQLITE_MAX_PARAMS]
+                rows = self._conn.execute(
+                    "SELECT item_id FROM seen_items WHERE source = ? AND item_id IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    (source, *chunk),
+                )
+                seen.update(row["item_id"] for row in rows)
+        return [item_id for item_id, key in zip(item_ids, keys) if key not in seen]
+
+    def mark_items_seen(self, source: str, item_ids: list) -> None:
+        if not item_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_items (source, item_id) VALUES (?, ?)",
+                [(source, str(item_id)) for item_id in item_ids],
+            )
+
+    def prune_seen_items(self, older_than_days: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM seen_items WHERE seen_at < datetime('now', ?)",
+                (f"-{older_than_days} days",),
+            ).rowcount
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="記事DBの全文検索とメンテナンス")
+    parser.add_argument("--db", default="data/articles.db")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-search-index")
+    search_parser = subparsers.add_parser("search")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--offset", type=int, default=0)
+    archive_parser = subparsers.add_parser("archive")
+    archive_parser.add_argument("--older-than-days", type=float, default=DEFAULT_RETENTION_DAYS)
+    archive_parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR)
+    read_parser = subparsers.add_parser("read-archive")
+    read_parser.add_argument("--archive-dir", default=DEFAULT_ARCHIVE_DIR)
+    read_parser.add_argument("--from", dest="start_month")
+    read_parser.add_argument("--to", dest="end_month")
+    args = parser.parse_args(argv)
+
+    if args.command == "read-archive":
+        for record in iter_archive(args.archive_dir, args.start_month, args.end_month):
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    with ArticleRepository(args.db) as repository:
+        if args.command == "rebuild-search-index":
+            repository.rebuild_search_index()
+            return 0
+        if args.command == "archive":
+            archived = repository.archive_older_than(args.older_than_days, args.archive_dir)
+            repository.compact()
+            print(f"{archived}件をアーカイブしました")
+            return 0
+        for result in repository.search(args.query, limit=args.limit, offset=args.offset):
+            print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import hashlib
+import re
+import struct
+import unicodedata
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_hsenc",
+    "_hsmi",
+    "ref",
+    "ref_src",
+    "cmpid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+SIGNATURE_SIZE = 32
+BAND_COUNT = 8
+ROWS_PER_BAND = SIGNATURE_SIZE // BAND_COUNT
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 2
+MIN_TOKENS = 16
+MAX_CHARS = 2000
+
+_UINT64_MASK = (1 << 64) - 1
+_DENSIFY_OFFSET = 0x9E3779B97F4A7C15
+_SIGNATURE_STRUCT = struct.Struct(f">{SIGNATURE_SIZE}Q")
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[^\sa-z0-9\W]")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path)
+    path = path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(name)
+        )
+    )
+    return urlunsplit(("", host, path, query, ""))
+
+
+def tokenize(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKC", _TAG_RE.sub(" ", text[:MAX_CHARS])).lower()
+    return _TOKEN_RE.findall(text)
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def minhash_signature(text: str) -> tuple[int, ...] | None:
+    tokens = tokenize(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    bins = [None] * SIGNATURE_SIZE
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        value = _hash64(" ".join(tokens[i : i + SHINGLE_SIZE]).encode())
+        index = value % SIGNATURE_SIZE
+        current = bins[index]
+        if current is None or value < current:
+            bins[index] = value
+    signature = []
+    for index in range(SIGNATURE_SIZE):
+        offset = 0
+        while bins[(index + offset) % SIGNATURE_SIZE] is None:
+            offset += 1
+        value = bins[(index + offset) % SIGNATURE_SIZE]
+        signature.append((value + offset * _DENSIFY_OFFSET) & _UINT64_MASK)
+    return tuple(signature)
+
+
+def estimate_similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+
+def lsh_bands(signature: tuple[int, ...]) -> tuple[int, ...]:
+    bands = []
+    for band in range(BAND_COUNT):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        bands.append(to_signed64(_hash64(struct.pack(f">{ROWS_PER_BAND}Q", *rows))))
+    return tuple(bands)
+
+
+def pack_signature(signature: tuple[int, ...]) -> bytes:
+    return _SIGNATURE_STRUCT.pack(*signature)
+
+
+def unpack_signature(data: bytes) -> tuple[int, ...]:
+    return _SIGNATURE_STRUCT.unpack(data)
+
+
+def to_signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def url_hash(canonical_url: str) -> int:
+    return to_signed64(_hash64(canonical_url.encode()))
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    canonical_url: str
+    signature: tuple[int, ...] | None
+
+    def bands(self) -> tuple[int | None, ...]:
+        if self.signature is None:
+            return (None,) * BAND_COUNT
+        return lsh_bands(self.signature)
+
+
+def fingerprint(url: str, title: str, body: str | None) -> Fingerprint:
+    return Fingerprint(canonicalize_url(url), minhash_signature(f"{title} {body or ''}"))
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = self.metrics.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, self.metrics.clock() - self.started, **self.labels)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._timers: dict[tuple[str, Labels], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def timing(self, name: str, **labels) -> dict | None:
+        with self._lock:
+            stats = self._timers.get((name, _labels(labels)))
+        if stats is None:
+            return None
+        return {"count": stats[0], "sum": stats[1], "max": stats[2]}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def _snapshot(self) -> tuple[dict, dict]:
+        with self._lock:
+            return dict(self._counters), {key: list(stats) for key, stats in self._timers.items()}
+
+    def to_prometheus(self) -> str:
+        counters, timers = self._snapshot()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name in sorted({name for name, _ in timers}):
+            lines.append(f"# TYPE {name} summary")
+            for (metric, labels), (count, total, _) in sorted(timers.items()):
+                if metric == name:
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_json_lines(self, timestamp: float | None = None) -> list[str]:
+        timestamp = time.time() if timestamp is None else timestamp
+        counters, timers = self._snapshot()
+        records = [
+            {
+                "timestamp": timestamp,
+                "type": "counter",
+                "name": name,
+                "labels": dict(labels),
+                "value": value,
+            }
+            for (name, labels), value in sorted(counters.items())
+        ]
+        records.extend(
+            {
+                "timestamp": timestamp,
+                "type": "timer",
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "sum": total,
+                "max": peak,
+            }
+            for (name, labels), (count, total, peak) in sorted(timers.items())
+        )
+        return [json.dumps(record, ensure_ascii=False) for record in records]
+
+    def write_prometheus(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json_lines(self, path: str) -> None:
+        with open(path, "a") as f:
+            for line in self.to_json_lines():
+                f.write(line + "\n")
+
+
+metrics = Metrics()
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Article:
+    title: str
+    url: str
+    summary: str
+    source: str
+    published: str
+    id: int | None = None
+    is_summarized: bool = False
+    created_at: str | None = None
@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.collector.hn_collector import BASE_URL, SEEN_RETENTION_DAYS, SOURCE_KEY, HnCollector
+from src.collector.rss_collector import RssCollector, load_feed_config
+from src.db.article_repository import ArticleRepository
+from src.metrics import metrics
+from src.models import Article
+from src.publisher.note_publisher import (
+    DIGEST_SIZE,
+    MAX_DIGESTS,
+    NOTE_POST_URL,
+    NotePublisher,
+    publish_pending,
+)
+from src.summarizer.article_summarizer import ArticleSummarizer
+from src.summarizer.summary_cache import SummaryCache
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+Fetch = Callable[[], tuple[list[Article], Callable[[], None]]]
+
+
+@dataclass(frozen=True)
+class _Progress:
+    source: str
+    commit: Callable[[], None]
+
+
+@dataclass
+class PipelineConfig:
+    queue_size: int = 100
+    collect_workers: int = 4
+    save_batch_size: int = 20
+    save_flush_interval: float = 1.0
+    summarize_workers: int = 4
+    publish_workers: int = 1
+    retry_unsummarized: bool = True
+    seen_retention_days: float = SEEN_RETENTION_DAYS
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "PipelineConfig":
+        fields = {field.name for field in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in (data or {}).items() if key in fields})
+
+
+@dataclass
+class PipelineStats:
+    collected: int = 0
+    saved: int = 0
+    save_failed: int = 0
+    summarized: int = 0
+    summarize_failed: int = 0
+    published: int = 0
+    publish_failed: int = 0
+    source_failed: int = 0
+
+
+class Pipeline:
+    def __init__(
+        self,
+        repository: ArticleRepository,
+        summarizer: ArticleSummarizer | None = None,
+        rss_collector: RssCollector | None = None,
+        hn_collector: HnCollector | None = None,
+        feeds: list[dict] | None = None,
+        publisher: Callable[[Article, str], None] | None = None,
+        config: PipelineConfig | None = None,
+    ):
+        self.repository = repository
+        self.summarizer = summarizer
+        self.rss_collector = rss_collector
+        self.hn_collector = hn_collector
+        self.feeds = feeds or []
+        self.publisher = publisher
+        self.config = config or PipelineConfig()
+        self.stats = PipelineStats()
+        self._stats_lock = threading.Lock()
+        self._queued_urls: set[str] = set()
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + amount)
+        metrics.increment("pipeline_items_total", amount, stage=field)
+
+    def _sources(self) -> list[tuple[str, Fetch]]:
+        sources = []
+        if self.rss_collector is not None:
+            for feed in self.feeds:
+                sources.append((feed["name"], lambda feed=feed: self._fetch_feed(feed)))
+        if self.hn_collector is not None:
+            sources.append((SOURCE_KEY, self._fetch_hn))
+        return sources
+
+    def _fetch_feed(self, feed: dict) -> tuple[list[Article], Callable[[], None]]:
+        result = self.rss_collector.fetch_feed_result(feed["url"], feed["name"])
+        if result.error:
+            raise RuntimeError(result.error)
+        return result.articles, lambda: self.rss_collector.commit(result)
+
+    def _fetch_hn(self) -> tuple[list[Article], Callable[[], None]]:
+        result = asyncio.run(self.hn_collector.fetch_story_result_async())
+        return result.articles, lambda: self.hn_collector.commit(result)
+
+    def _collect_worker(self, sources: queue.Queue, saved: queue.Queue) -> None:
+        while True:
+            try:
+                name, fetch = sources.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                articles, commit = fetch()
+            except Exception as e:
+                logger.error("収集失敗: %s (%s)", name, e)
+                self._count("source_failed")
+                continue
+            self._count("collected", len(articles))
+            for article in articles:
+                saved.put(article)
+            saved.put(_Progress(name, commit))
+
+    def _enqueue_summary(self, summarize: queue.Queue, article: Article) -> None:
+        with self._stats_lock:
+            if article.url in self._queued_urls:
+                return
+            self._queued_urls.add(article.url)
+        summarize.put(article)
+
+    def _seed_worker(self, summarize: queue.Queue) -> None:
+        try:
+            for article in self.repository.iter_unsummarized_articles():
+                self._enqueue_summary(summarize, article)
+        except Exception as e:
+            logger.error("未要約記事の読み込み失敗: %s", e)
+
+    def _save_batch(self, batch: list[Article], summarize: queue.Queue | None) -> bool:
+        if not batch:
+            return True
+        try:
+            inserted = self.repository.save_new(batch)
+        except Exception as e:
+            logger.error("記事保存失敗: %d件 (%s)", len(batch), e)
+            return False
+        batch.clear()
+        self._count("saved", len(inserted))
+        if summarize is not None:
+            for article in inserted:
+                self._enqueue_summary(summarize, article)
+        return True
+
+    def _commit_progress(
+        self, progress: _Progress, batch: list[Article], summarize: queue.Queue | None
+    ) -> None:
+        if not self._save_batch(batch, summarize):
+            logger.warning("未保存の記事が残っているため取得位置を更新しない: %s", progress.source)
+            return
+        try:
+            progress.commit()
+        except Exception as e:
+            logger.error("取得位置の保存失敗: %s (%s)", progress.source, e)
+
+    def _save_worker(self, saved: queue.Queue, summarize: queue.Queue | None) -> None:
+        batch: list[Article] = []
+        while True:
+            try:
+                item = saved.get(timeout=self.config.save_flush_interval)
+            except queue.Empty:
+                self._save_batch(batch, summarize)
+                continue
+            if item is _DONE:
+                if not self._save_batch(batch, summarize):
+                    self._count("save_failed", len(batch))
+                return
+            if isinstance(item, _Progress):
+                self._commit_progress(item, batch, summarize)
+                continue
+            batch.append(item)
+            if len(batch) >= self.config.save_batch_size:
+                self._save_batch(batch, summarize)
+
+    def _summarize_worker(self, summarize: queue.Queue, publish: queue.Queue | None) -> None:
+        while True:
+            article = summarize.get()
+            if article is _DONE:
+                return
+            result = self.summarizer.summarize_article(article)
+            if result["summary"] is None:
+                logger.error("要約失敗: %s (%s)", article.url, result["error"])
+                self._count("summarize_failed")
+                continue
+            try:
+                self.repository.save_summaries([result])
+            except Exception as e:
+                logger.error("要約保存失敗: %s (%s)", article.url, e)
+                self._count("summarize_failed")
+                continue
+            self._count("summarized")
+            if publish is not None:
+                publish.put((article, result["summary"]))
+
+    def _publish_worker(self, publish: queue.Queue) -> None:
+        while True:
+            item = publish.get()
+            if item is _DONE:
+                return
+            article, summary = item
+            try:
+                self.publisher(article, summary)
+                self.repository.mark_as_published([article.url])
+            except Exception as e:
+                logger.error("公開失敗: %s (%s)", article.url, e)
+                self._count("publish_failed")
+                continue
+            self._count("published")
+
+    def _start(self, workers: int, target, *args) -> list[threading.Thread]:
+        threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _stop(self, threads: list[threading.Thread], inbox: queue.Queue | None) -> None:
+        for _ in threads:
+            inbox.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    def run(self) -> PipelineStats:
+        self.stats = PipelineStats()
+        self._queued_urls = set()
+        size = self.config.queue_size
+        sources: queue.Queue = queue.Queue()
+        for source in self._sources():
+            sources.put(source)
+        saved: queue.Queue = queue.Queue(maxsize=size)
+        summarize = queue.Queue(maxsize=size) if self.summarizer is not None else None
+        publish = None
+        if summarize is not None and self.publisher is not None:
+            publish = queue.Queue(maxsize=size)
+
+        summarize_threads, publish_threads = [], []
+        if publish is not None:
+            publish_threads = self._start(
+                self.config.publish_workers, self._publish_worker, publish
+            )
+        if summarize is not None:
+            summarize_threads = self._start(
+                self.config.summarize_workers, self._summarize_worker, summarize, publish
+            )
+        seed_threads = []
+        if summarize is not None and self.config.retry_unsummarized:
+            seed_threads = self._start(1, self._seed_worker, summarize)
+        save_threads = self._start(1, self._save_worker, saved, summarize)
+        collect_threads = self._start(
+            min(self.config.collect_workers, max(sources.qsize(), 1)),
+            self._collect_worker,
+            sources,
+            saved,
+        )
+
+        for thread in collect_threads:
+            thread.join()
+        self._stop(save_threads, saved)
+        for thread in seed_threads:
+            thread.join()
+        self._stop(summarize_threads, summarize)
+        self._stop(publish_threads, publish)
+
+        if self.rss_collector is not None:
+            self.rss_collector.save_cache()
+        if self.hn_collector is not None:
+            pruned = self.repository.prune_seen_items(self.config.seen_retention_days)
+            logger.info("既読IDを削除: %d件", pruned)
+        if self.summarizer is not None and self.summarizer.cache is not None:
+            self.summarizer.cache.evict()
+        return self.stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="収集・保存・要約・公開パイプライン")
+    parser.add_argument("--config", default="config/feeds.json")
+    parser.add_argument("--db", default="data/articles.db")
+    parser.add_argument("--feed-cache", default="data/feed_cache.json")
+    parser.add_argument("--no-summarize", action="store_true")
+    parser.add_argument("--publish", action="store_true")
+    parser.add_argument("--metrics-prom")
+    parser.add_argument("--metrics-jsonl")
+    args = parser.parse_args(argv)
+    metrics.enabled = bool(args.metrics_prom or args.metrics_jsonl)
+
+    config = load_feed_config(args.config)
+    pipeline_config = PipelineConfig.from_dict(config.get("pipeline"))
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+
+    repository = ArticleRepository(args.db)
+    rss_collector = RssCollector(
+        max_workers=pipeline_config.collect_workers,
+        cache_path=args.feed_cache,
+        watermarks=repository,
+    )
+    hn_config = config.get("hacker_news")
+    hn_collector = None
+    if hn_config:
+        hn_collector = HnCollector(
+            keywords=hn_config.get("keywords"),
+            max_stories=hn_config.get("max_stories", 30),
+            base_url=hn_config.get("base_url", BASE_URL),
+            seen_store=repository,
+        )
+    cache = summarizer = None
+    if not args.no_summarize:
+        cache = SummaryCache(args.db)
+        summarizer = ArticleSummarizer(api_key=os.environ["ANTHROPIC_API_KEY"], cache=cache)
+
+    pipeline = Pipeline(
+        repository,
+        summarizer=summarizer,
+        rss_collector=rss_collector,
+        hn_collector=hn_collector,
+        feeds=config.get("rss_feeds", []),
+        config=pipeline_config,
+    )
+    published = 0
+    try:
+        stats = pipeline.run()
+        if args.publish:
+            publisher_config = config.get("publisher", {})
+            with NotePublisher(
+                storage_state_path=publisher_config.get("storage_state"),
+                post_url=publisher_config.get("post_url", NOTE_POST_URL),
+                selectors=publisher_config.get("selectors"),
+            ) as publisher:
+                published = publish_pending(
+                    repository,
+                    publisher,
+                    publisher_config.get("digest_size", DIGEST_SIZE),
+                    publisher_config.get("max_digests", MAX_DIGESTS),
+                )
+    finally:
+        rss_collector.close()
+        if cache is not None:
+            cache.close()
+        repository.close()
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+    if args.metrics_jsonl:
+        metrics.write_json_lines(args.metrics_jsonl)
+    report = {**dataclasses.asdict(stats), "digest_published": published}
+    print(json.dumps(report, ensure_ascii=False))
+    return 0 if stats.source_failed == 0 and stats.save_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
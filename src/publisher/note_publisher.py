@@ -0,0 +1,192 @@
+import argparse
+import logging
+import os
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+
+from src.models import Article
+
+logger = logging.getLogger(__name__)
+
+NOTE_POST_URL = "https://note.com/notes/new"
+
+NOTE_LOGIN_URL = "https://note.com/login"
+
+DEFAULT_SELECTORS = {
+    "title": "textarea[placeholder='記事タイトル']",
+    "body": "div.ProseMirror",
+    "publish": "button:has-text('公開に進む')",
+    "confirm": "button:has-text('投稿する')",
+    "done": None,
+}
+
+DIGEST_SIZE = 5
+MAX_DIGESTS = 1
+
+DIGEST_TITLE = "Data・AIニュースまとめ"
+
+
+@dataclass
+class Digest:
+    title: str
+    body: str
+    urls: list[str]
+
+
+def build_digest(articles: list[Article], title: str | None = None) -> Digest:
+    sections = []
+    for article in articles:
+        lines = [f"■ {article.title}"]
+        if article.summary:
+            lines.append(article.summary)
+        source = f"出典: {article.source}" if article.source else "出典"
+        lines.append(f"{source} {article.url}")
+        sections.append("\n".join(lines))
+    return Digest(
+        title=title or f"{DIGEST_TITLE} {date.today().isoformat()}",
+        body="\n\n".join(sections),
+        urls=[article.url for article in articles],
+    )
+
+
+class NotePublisher:
+    def __init__(
+        self,
+        storage_state_path: str | None = None,
+        post_url: str = NOTE_POST_URL,
+        selectors: dict[str, str | None] | None = None,
+        headless: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.storage_state_path = storage_state_path
+        self.post_url = post_url
+        self.selectors = {**DEFAULT_SELECTORS, **(selectors or {})}
+        self.headless = headless
+        self.timeout = timeout
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+
+    def start(self) -> None:
+        if self._context is not None:
+            return
+        from playwright.sync_api import sync_playwright
+
+        self._playwright = sync_playwright().start()
+        try:
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+            state = self.storage_state_path
+            self._context = self._browser.new_context(
+                storage_state=state if state and os.path.exists(state) else None
+            )
+            self._context.set_default_timeout(self.timeout * 1000)
+        except Exception:
+            self.close()
+            raise
+
+    def _acquire_page(self):
+        self.start()
+        if self._page is None or self._page.is_closed():
+            self._page = self._context.new_page()
+        return self._page
+
+    def open(self, url: str):
+        page = self._acquire_page()
+        page.goto(url)
+        return page
+
+    def publish(self, title: str, body: str, on_submitted: Callable[[], None] | None = None) -> str:
+        page = self._acquire_page()
+        try:
+            page.goto(self.post_url)
+            page.fill(self.selectors["title"], title)
+            page.fill(self.selectors["body"], body)
+            page.click(self.selectors["publish"])
+            if self.selectors["confirm"]:
+                page.click(self.selectors["confirm"])
+            if on_submitted is not None:
+                on_submitted()
+            if self.selectors["done"]:
+                page.wait_for_selector(self.selectors["done"])
+            else:
+                page.wait_for_load_state()
+        except Exception:
+            page.close()
+            self._page = None
+            raise
+        logger.info("投稿しました: %s", title)
+        return page.url
+
+    def publish_digest(self, digest: Digest, on_submitted: Callable[[], None] | None = None) -> str:
+        return self.publish(digest.title, digest.body, on_submitted)
+
+    def save_storage_state(self) -> None:
+        if self._context is not None and self.storage_state_path:
+            os.makedirs(os.path.dirname(self.storage_state_path) or ".", exist_ok=True)
+            self._context.storage_state(path=self.storage_state_path)
+
+    def close(self) -> None:
+        if self._context is not None:
+            try:
+                self.save_storage_state()
+            finally:
+                self._context.close()
+        if self._browser is not None:
+            self._browser.close()
+        if self._playwright is not None:
+            self._playwright.stop()
+        self._playwright = self._browser = self._context = self._page = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def publish_pending(
+    repository, publisher, digest_size: int = DIGEST_SIZE, max_digests: int = MAX_DIGESTS
+) -> int:
+    articles = list(repository.iter_unpublished_articles(limit=digest_size * max_digests))
+    chunks = [articles[i : i + digest_size] for i in range(0, len(articles), digest_size)]
+    published = 0
+    for index, chunk in enumerate(chunks, start=1):
+        title = f"{DIGEST_TITLE} {date.today().isoformat()}"
+        if len(chunks) > 1:
+            title += f" ({index}/{len(chunks)})"
+        digest = build_digest(chunk, title=title)
+        marked = []
+        try:
+            publisher.publish_digest(
+                digest,
+                on_submitted=lambda: marked.append(repository.mark_as_published(digest.urls)),
+            )
+        except Exception as e:
+            if marked:
+                logger.warning("投稿は送信済みですが完了を確認できません: %s (%s)", digest.title, e)
+                published += marked[0]
+            else:
+                logger.error("投稿失敗: %s (%s)", digest.title, e)
+            break
+        published += marked[0] if marked else repository.mark_as_published(digest.urls)
+    return published
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Noteのログイン状態を保存する")
+    parser.add_argument("--state", default="data/note_state.json")
+    parser.add_argument("--login-url", default=NOTE_LOGIN_URL)
+    args = parser.parse_args(argv)
+
+    with NotePublisher(storage_state_path=args.state, headless=False) as publisher:
+        publisher.open(args.login_url)
+        input("ブラウザでログインしたらEnterを押してください: ")
+    print(args.state)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
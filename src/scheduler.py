@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import dataclasses
+import logging
+import random
+import signal
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.collector.hn_collector import BASE_URL, SEEN_RETENTION_DAYS, SOURCE_KEY, HnCollector
+from src.collector.rss_collector import RssCollector, load_feed_config
+from src.db.article_repository import ArticleRepository
+from src.metrics import metrics
+from src.models import Article
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 86400.0
+
+
+@dataclass
+class ScheduleBounds:
+    min_interval: float = 600.0
+    max_interval: float = 86400.0
+    initial_interval: float = 3600.0
+
+    @classmethod
+    def from_dict(cls, data: dict | None, default: "ScheduleBounds | None" = None):
+        base = dataclasses.asdict(default or cls())
+        fields = {field.name for field in dataclasses.fields(cls)}
+        base.update({key: float(value) for key, value in (data or {}).items() if key in fields})
+        return cls(**base)
+
+    def clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+
+@dataclass
+class SourceState:
+    interval: float
+    next_poll_at: float = 0.0
+    last_polled_at: float | None = None
+    rate: float | None = None
+    polls: int = 0
+    new_items: int = 0
+    failures: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SourceState":
+        fields = {field.name for field in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+
+@dataclass
+class Source:
+    key: str
+    name: str
+    fetch: Callable[[], tuple[list[Article], Callable[[], None] | None]]
+    bounds: ScheduleBounds
+
+
+class AdaptiveScheduler:
+    def __init__(
+        self,
+        sources: list[Source],
+        repository: ArticleRepository,
+        max_concurrency: int = 4,
+        jitter: float = 0.1,
+        target_new_items: float = 1.0,
+        smoothing: float = 0.3,
+        backoff: float = 1.5,
+        sink: Callable[[list[Article]], None] | None = None,
+        seen_retention_days: float | None = None,
+        clock: Callable[[], float] = time.time,
+        rng: random.Random | None = None,
+    ):
+        self.sources = {source.key: source for source in sources}
+        self.repository = repository
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.target_new_items = target_new_items
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self.sink = sink
+        self.seen_retention_days = seen_retention_days
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.states = self._load_states()
+        self._pruned_at: float | None = None
+
+    def _load_states(self) -> dict[str, SourceState]:
+        stored = self.repository.get_schedules()
+        states = {}
+        for key, source in self.sources.items():
+            if key in stored:
+                state = SourceState.from_dict(stored[key])
+                state.interval = source.bounds.clamp(state.interval)
+            else:
+                state = SourceState(interval=source.bounds.clamp(source.bounds.initial_interval))
+            states[key] = state
+        return states
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _next_interval(self, source: Source, state: SourceState, new_items: int, now: float):
+        if state.last_polled_at is None:
+            return state.interval
+        elapsed = max(now - state.last_polled_at, 1.0)
+        observed = new_items / elapsed
+        if state.rate is None:
+            state.rate = observed
+        else:
+            state.rate = self.smoothing * observed + (1 - self.smoothing) * state.rate
+        if state.rate > 0:
+            interval = self.target_new_items / state.rate
+        else:
+            interval = state.interval * self.backoff
+        return source.bounds.clamp(interval)
+
+    def due(self, now: float | None = None) -> list[Source]:
+        now = self.clock() if now is None else now
+        due = [key for key, state in self.states.items() if state.next_poll_at <= now]
+        due.sort(key=lambda key: self.states[key].next_poll_at)
+        return [self.sources[key] for key in due]
+
+    def seconds_until_next(self, now: float | None = None) -> float:
+        now = self.clock() if now is None else now
+        if not self.states:
+            return float("inf")
+        return max(min(state.next_poll_at for state in self.states.values()) - now, 0.0)
+
+    def _retry_later(self, source: Source, state: SourceState, at: float) -> int:
+        state.failures += 1
+        state.next_poll_at = at
+        self.repository.set_schedule(source.key, dataclasses.asdict(state))
+        return 0
+
+    def poll(self, source: Source) -> int:
+        with metrics.timer("scheduler_poll_seconds", source=source.name):
+            return self._poll(source)
+
+    def _poll(self, source: Source) -> int:
+        state = self.states[source.key]
+        started = self.clock()
+        try:
+            articles, commit = source.fetch()
+        except Exception as e:
+            logger.error("ソース取得失敗: %s (%s)", source.name, e)
+            metrics.increment("scheduler_poll_errors_total", source=source.name)
+            return self._retry_later(source, state, started + self._jittered(state.interval))
+        try:
+            inserted = self.repository.save_new(articles) if articles else []
+            if commit is not None:
+                commit()
+        except Exception as e:
+            logger.error("記事保存失敗: %s %d件 (%s)", source.name, len(articles), e)
+            metrics.increment("scheduler_save_errors_total", source=source.name)
+            retry_at = self.clock() + self._jittered(source.bounds.min_interval)
+            return self._retry_later(source, state, retry_at)
+
+        now = self.clock()
+        state.interval = self._next_interval(source, state, len(inserted), now)
+        state.last_polled_at = now
+        state.next_poll_at = now + self._jittered(state.interval)
+        state.polls += 1
+        state.new_items += len(inserted)
+        state.failures = 0
+        self.repository.set_schedule(source.key, dataclasses.asdict(state))
+        metrics.increment("scheduler_polls_total", source=source.name)
+        metrics.increment("scheduler_new_items_total", len(inserted), source=source.name)
+        logger.info(
+            "ソース取得: %s 新着%d件 次回%.0f秒後", source.name, len(inserted), state.interval
+        )
+        if inserted and self.sink is not None:
+            self.sink(inserted)
+        return len(inserted)
+
+    def prune(self, now: float | None = None) -> None:
+        now = self.clock() if now is None else now
+        if self.seen_retention_days is None:
+            return
+        if self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        pruned = self.repository.prune_seen_items(self.seen_retention_days)
+        logger.info("既読IDを削除: %d件", pruned)
+
+    def run_once(self, now: float | None = None) -> dict[str, int]:
+        self.prune(now)
+        due = self.due(now)
+        if not due:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            counts = list(executor.map(self.poll, due))
+        return {source.key: count for source, count in zip(due, counts)}
+
+    def run_forever(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self.run_once()
+            stop.wait(self.seconds_until_next())
+
+
+def _fetch_feed(
+    rss_collector: RssCollector, feed: dict
+) -> tuple[list[Article], Callable[[], None]]:
+    result = rss_collector.fetch_feed_result(feed["url"], feed["name"])
+    return result.articles, lambda: rss_collector.commit(result)
+
+
+def _fetch_hn(hn_collector: HnCollector) -> tuple[list[Article], Callable[[], None]]:
+    result = asyncio.run(hn_collector.fetch_story_result_async())
+    return result.articles, lambda: hn_collector.commit(result)
+
+
+def build_sources(
+    config: dict, rss_collector: RssCollector, hn_collector: HnCollector | None
+) -> list[Source]:
+    scheduler_config = config.get("scheduler", {})
+    defaults = ScheduleBounds.from_dict(scheduler_config)
+    overrides = scheduler_config.get("sources", {})
+    sources = []
+    for feed in config.get("rss_feeds", []):
+        sources.append(
+            Source(
+                key=feed["url"],
+                name=feed["name"],
+                fetch=lambda feed=feed: _fetch_feed(rss_collector, feed),
+                bounds=ScheduleBounds.from_dict(overrides.get(feed["name"]), defaults),
+            )
+        )
+    if hn_collector is not None:
+        sources.append(
+            Source(
+                key=SOURCE_KEY,
+                name=SOURCE_KEY,
+                fetch=lambda: _fetch_hn(hn_collector),
+                bounds=ScheduleBounds.from_dict(overrides.get(SOURCE_KEY), defaults),
+            )
+        )
+    return sources
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="ソースごとに取得間隔を調整する常駐スケジューラ")
+    parser.add_argument("--config", default="config/feeds.json")
+    parser.add_argument("--db", default="data/articles.db")
+    parser.add_argument("--feed-cache", default="data/feed_cache.json")
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = load_feed_config(args.config)
+    scheduler_config = config.get("scheduler", {})
+    repository = ArticleRepository(args.db)
+    rss_collector = RssCollector(cache_path=args.feed_cache, watermarks=repository)
+    hn_config = config.get("hacker_news")
+    hn_collector = None
+    if hn_config:
+        hn_collector = HnCollector(
+            keywords=hn_config.get("keywords"),
+            max_stories=hn_config.get("max_stories", 30),
+            base_url=hn_config.get("base_url", BASE_URL),
+            seen_store=repository,
+        )
+    scheduler = AdaptiveScheduler(
+        build_sources(config, rss_collector, hn_collector),
+        repository,
+        max_concurrency=scheduler_config.get("max_concurrency", 4),
+        jitter=scheduler_config.get("jitter", 0.1),
+        target_new_items=scheduler_config.get("target_new_items", 1.0),
+        seen_retention_days=scheduler_config.get("seen_retention_days", SEEN_RETENTION_DAYS),
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            scheduler.run_forever(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rss_collector.save_cache()
+        rss_collector.close()
+        repository.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,24 @@
-import anthropic
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+
+from src.metrics import metrics
+from src.models import Article
+from src.summarizer.rate_limiter import RateLimiter
+from src.summarizer.summary_cache import SummaryCache, cache_key
+
+if TYPE_CHECKING:
+    import anthropic
+
+logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = (
     "あなたはData・AI分野の専門ニュースライターです。"
@@ -9,31 +29,335 @@ SYSTEM_PROMPT = (
 
 DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
 
+MAX_TOKENS = 512
+
+MAX_INPUT_TOKENS = 2000
+
+CHARS_PER_TOKEN = 2
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+MAX_BATCH_REQUESTS = 10_000
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def strip_html(text: str | None) -> str:
+    if not text:
+        return ""
+    if "<" not in text and "&" not in text:
+        return _WHITESPACE_RE.sub(" ", text).strip()
+    extractor = _TextExtractor()
+    extractor.feed(text)
+    extractor.close()
+    return _WHITESPACE_RE.sub(" ", " ".join(extractor.parts)).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + "…"
+
+
+def as_article(article: Article | dict) -> Article:
+    if isinstance(article, Article):
+        return article
+    return Article(
+        title=article["title"],
+        url=article["url"],
+        summary=article.get("summary") or "",
+        source=article.get("source") or "",
+        published=article.get("published") or "",
+    )
+
+
+def usage_from(message) -> dict:
+    usage = getattr(message, "usage", None)
+    return {field: int(getattr(usage, field, 0) or 0) for field in USAGE_FIELDS}
+
 
 class ArticleSummarizer:
-    def __init__(self, api_key: str, model: str = DEFAULT_MODEL):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_MODEL,
+        max_workers: int = 1,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
+        client: "anthropic.Anthropic | None" = None,
+        cache: SummaryCache | None = None,
+        max_tokens: int = MAX_TOKENS,
+        max_input_tokens: int = MAX_INPUT_TOKENS,
+    ):
+        if client is None:
+            import anthropic
+
+            client = anthropic.Anthropic(api_key=api_key, max_retries=0)
+        self.client = client
         self.model = model
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.cache = cache
+        self.max_tokens = max_tokens
+        self.max_input_tokens = max_input_tokens
+        self.usage_totals = dict.fromkeys(USAGE_FIELDS, 0)
+        self._usage_lock = threading.Lock()
 
-    def summarize(self, title: str, content: str) -> str:
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        delay = self.retry_base_delay * 2**attempt
+        return delay + random.uniform(0, delay / 2)
+
+    def _call_with_retry(self, fn, *args, tokens: int | None = None, **kwargs):
+        import anthropic
+
+        for attempt in range(self.max_retries + 1):
+            if tokens is not None:
+                self.rate_limiter.acquire(tokens)
+            try:
+                return fn(*args, **kwargs)
+            except anthropic.APIStatusError as e:
+                if e.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                metrics.increment("llm_retries_total", reason=e.status_code)
+            except anthropic.APIConnectionError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                metrics.increment("llm_retries_total", reason="connection")
+            logger.info("API呼び出しをリトライします: %.1f秒後 (%d回目)", delay, attempt + 1)
+            time.sleep(delay)
+
+    def _build_params(self, title: str, content: str) -> dict:
+        content = truncate_to_tokens(strip_html(content), self.max_input_tokens)
         user_message = f"タイトル: {title}\n\n本文: {content}" if content else f"タイトル: {title}"
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_message}],
-        )
-        return response.content[0].text
-
-    def summarize_articles(self, articles: list[dict]) -> list[dict]:
-        results = []
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": [
+                {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [{"role": "user", "content": user_message}],
+        }
+
+    def _record_usage(self, usage: dict) -> None:
+        with self._usage_lock:
+            for field, value in usage.items():
+                self.usage_totals[field] += value
+        for field, value in usage.items():
+            metrics.increment("llm_tokens_total", value, type=field)
+
+    def summarize_with_usage(self, title: str, content: str) -> tuple[str, dict]:
+        key = None
+        if self.cache is not None:
+            key = cache_key(title, content, self.model, SYSTEM_PROMPT)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, dict.fromkeys(USAGE_FIELDS, 0)
+
+        params = self._build_params(title, content)
+        user_message = params["messages"][0]["content"]
+        tokens = estimate_tokens(SYSTEM_PROMPT + user_message) + self.max_tokens
+        with metrics.timer("llm_request_seconds", model=self.model):
+            response = self._call_with_retry(self.client.messages.create, tokens=tokens, **params)
+        metrics.increment("llm_requests_total", model=self.model)
+        summary = response.content[0].text
+        usage = usage_from(response)
+        self._record_usage(usage)
+        if key is not None:
+            self.cache.put(key, summary)
+        return summary, usage
+
+    def summarize(self, title: str, content: str) -> str:
+        return self.summarize_with_usage(title, content)[0]
+
+    def _article_cache_key(self, article: Article) -> str:
+        return cache_key(article.title, article.summary, self.model, SYSTEM_PROMPT)
+
+    def summarize_article(self, article: Article | dict) -> dict:
+        article = as_article(article)
+        try:
+            summary, usage = self.summarize_with_usage(title=article.title, content=article.summary)
+            return {"url": article.url, "summary": summary, "usage": usage}
+        except Exception as e:
+            metrics.increment("llm_errors_total", model=self.model)
+            return {"url": article.url, "summary": None, "error": str(e)}
+
+    def summarize_articles(self, articles: list[Article | dict]) -> list[dict]:
+        articles = [as_article(article) for article in articles]
+        unique: dict[str, Article] = {}
+        keys = []
         for article in articles:
-            try:
-                summary = self.summarize(
-                    title=article["title"],
-                    content=article.get("summary", ""),
+            key = self._article_cache_key(article)
+            unique.setdefault(key, article)
+            keys.append(key)
+
+        if self.max_workers <= 1:
+            outcomes = [self.summarize_article(article) for article in unique.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                outcomes = list(executor.map(self.summarize_article, unique.values()))
+        by_key = dict(zip(unique, outcomes))
+
+        if self.cache is not None:
+            self.cache.evict()
+        return [{**by_key[key], "url": article.url} for key, article in zip(keys, articles)]
+
+    def _load_batch_state(self, state_path: str) -> dict:
+        if not os.path.exists(state_path):
+            return {"batch_id": None, "requests": {}, "results": {}}
+        with open(state_path) as f:
+            return json.load(f)
+
+    def _save_batch_state(self, state_path: str, state: dict) -> None:
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+
+    def _submit_batch(self, articles: list[Article]) -> str:
+        requests = [
+            {
+                "custom_id": _batch_custom_id(article.url),
+                "params": self._build_params(article.title, article.summary),
+            }
+            for article in articles
+        ]
+        batch = self._call_with_retry(self.client.messages.batches.create, requests=requests)
+        logger.info("メッセージバッチを送信しました: %s (%d件)", batch.id, len(requests))
+        return batch.id
+
+    def _wait_for_batch(self, batch_id: str, poll_interval: float) -> None:
+        while True:
+            batch = self._call_with_retry(self.client.messages.batches.retrieve, batch_id)
+            if batch.processing_status == "ended":
+                return
+            time.sleep(poll_interval)
+
+    def _collect_batch_results(self, batch_id: str) -> dict[str, dict]:
+        collected = {}
+        for entry in self._call_with_retry(self.client.messages.batches.results, batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                usage = usage_from(result.message)
+                self._record_usage(usage)
+                collected[entry.custom_id] = {
+                    "summary": result.message.content[0].text,
+                    "usage": usage,
+                }
+            elif result.type == "errored":
+                collected[entry.custom_id] = {"error": str(result.error)}
+            else:
+                collected[entry.custom_id] = {"error": f"batch request {result.type}"}
+        return collected
+
+    def summarize_articles_batch(
+        self, articles: list[Article | dict], state_path: str, poll_interval: float = 60.0
+    ) -> list[dict]:
+        articles = [as_article(article) for article in articles]
+        state = self._load_batch_state(state_path)
+        wanted = {_batch_custom_id(article.url) for article in articles}
+        state["results"] = {
+            custom_id: outcome
+            for custom_id, outcome in state["results"].items()
+            if custom_id in wanted and "summary" in outcome
+        }
+
+        if self.cache is not None:
+            for article in articles:
+                custom_id = _batch_custom_id(article.url)
+                if custom_id in state["results"]:
+                    continue
+                cached = self.cache.get(self._article_cache_key(article))
+                if cached is not None:
+                    state["results"][custom_id] = {"summary": cached}
+
+        while True:
+            if state["batch_id"] is None:
+                pending = {
+                    _batch_custom_id(article.url): article
+                    for article in articles
+                    if _batch_custom_id(article.url) not in state["results"]
+                }
+                if not pending:
+                    break
+                chunk = list(pending.values())[:MAX_BATCH_REQUESTS]
+                state["batch_id"] = self._submit_batch(chunk)
+                state["requests"] = {_batch_custom_id(a.url): a.url for a in chunk}
+                self._save_batch_state(state_path, state)
+
+            self._wait_for_batch(state["batch_id"], poll_interval)
+            collected = self._collect_batch_results(state["batch_id"])
+            if self.cache is not None:
+                by_custom_id = {_batch_custom_id(a.url): a for a in articles}
+                for custom_id, outcome in collected.items():
+                    article = by_custom_id.get(custom_id)
+                    if article and "summary" in outcome:
+                        self.cache.put(self._article_cache_key(article), outcome["summary"])
+            for custom_id in state["requests"]:
+                if custom_id not in wanted:
+                    continue
+                state["results"][custom_id] = collected.get(
+                    custom_id, {"error": "batch result missing"}
                 )
-                results.append({"url": article["url"], "summary": summary})
-            except Exception as e:
-                results.append({"url": article["url"], "summary": None, "error": str(e)})
+            state["batch_id"] = None
+            state["requests"] = {}
+            self._save_batch_state(state_path, state)
+
+        results = []
+        for article in articles:
+            outcome = state["results"][_batch_custom_id(article.url)]
+            if "summary" in outcome:
+                results.append({"url": article.url, **outcome})
+            else:
+                results.append({"url": article.url, "summary": None, "error": outcome["error"]})
         return results
+
+
+def _batch_custom_id(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
@@ -0,0 +1,59 @@
+import threading
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.requests = (
+            TokenBucket(requests_per_minute, clock, sleep) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute, clock, sleep) if tokens_per_minute else None
+
+    def acquire(self, tokens: int = 0) -> float:
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.tokens and tokens:
+            waited += self.tokens.acquire(tokens)
+        return waited
@@ -0,0 +1,123 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections.abc import Callable
+
+from src.db.connection import connect
+from src.metrics import metrics
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS summary_cache (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+)
+"""
+
+CREATE_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_summary_cache_last_used_at ON summary_cache (last_used_at)"
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str | None) -> str:
+    normalized = unicodedata.normalize("NFKC", text or "").lower()
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def cache_key(title: str, content: str | None, model: str, system_prompt: str) -> str:
+    parts = (normalize_text(title), normalize_text(content), model, system_prompt)
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class SummaryCache:
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int | None = None,
+        max_age_days: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._conn = connect(db_path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(CREATE_TABLE_SQL)
+            self._conn.execute(CREATE_INDEX_SQL)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _expires_before(self) -> float | None:
+        if self.max_age_days is None:
+            return None
+        return self._clock() - self.max_age_days * 86400
+
+    def get(self, key: str) -> str | None:
+        now = self._clock()
+        expires_before = self._expires_before()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (expires_before is not None and row["created_at"] < expires_before):
+                self.misses += 1
+                metrics.increment("summary_cache_misses_total")
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE summary_cache SET last_used_at = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+            metrics.increment("summary_cache_hits_total")
+            return row["summary"]
+
+    def put(self, key: str, summary: str) -> None:
+        now = self._clock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO summary_cache (key, summary, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "summary = excluded.summary, created_at = excluded.created_at, "
+                "last_used_at = excluded.last_used_at",
+                (key, summary, now, now),
+            )
+
+    def evict(self) -> int:
+        expires_before = self._expires_before()
+        removed = 0
+        with self._lock, self._conn:
+            if expires_before is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM summary_cache WHERE created_at < ?", (expires_before,)
+                ).rowcount
+            if self.max_entries is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM summary_cache WHERE key IN ("
+                    "SELECT key FROM summary_cache ORDER BY last_used_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,6 +1,37 @@
+import asyncio
 from unittest.mock import MagicMock, patch
 
+import httpx
+
 from src.collector.hn_collector import HnCollector
+from src.db.article_repository import ArticleRepository
+
+
+def _make_hn_transport(items, fail_counts=None, prefetch_missing=()):
+    fail_counts = dict(fail_counts or {})
+    requested = []
+
+    def handler(request):
+        path = request.url.path
+        requested.append(path)
+        if request.url.host == "hn.algolia.com":
+            tags = request.url.params["tags"]
+            wanted = {int(tag.removeprefix("story_")) for tag in tags[7:-1].split(",")}
+            hits = [
+                {"objectID": str(story_id), "title": item["title"]}
+                for story_id, item in items.items()
+                if story_id in wanted and story_id not in prefetch_missing
+            ]
+            return httpx.Response(200, json={"hits": hits})
+        if path.endswith("topstories.json"):
+            return httpx.Response(200, json=list(items))
+        story_id = int(path.rsplit("/", 1)[-1].removesuffix(".json"))
+        if fail_counts.get(story_id, 0) > 0:
+            fail_counts[story_id] -= 1
+            return httpx.Response(503)
+        return httpx.Response(200, json=items[story_id])
+
+    return httpx.MockTransport(handler), requested
 
 
 class TestHnCollector:
@@ -14,6 +45,10 @@ class TestHnCollector:
         collector = HnCollector(keywords=["machine learning"])
         assert collector.is_relevant("Machine Learning trends") is True
 
+    def test_キーワードは単語の一部にはマッチしない(self):
+        collector = HnCollector(keywords=["AI"])
+        assert collector.is_relevant("He said it was fine") is False
+
     @patch("src.collector.hn_collector.httpx.get")
     def test_トップストーリーのIDを取得できる(self, mock_get):
         mock_response = MagicMock()
@@ -59,3 +94,196 @@ class TestHnCollector:
         article = collector.fetch_story(123)
 
         assert article is None
+
+
+class TestHnCollectorAsync:
+    def _items(self):
+        return {
+            1: {"title": "AI breakthrough", "url": "https://example.com/1", "type": "story"},
+            2: {"title": "Cooking tips", "url": "https://example.com/2", "type": "story"},
+            3: {"title": "New LLM released", "url": "https://example.com/3", "type": "story"},
+            4: {"title": "AI job", "url": "https://example.com/4", "type": "job"},
+            5: {"title": "Claude update", "url": "https://example.com/5", "type": "story"},
+        }
+
+    def test_非同期取得は逐次取得と同じ順序で記事を返す(self):
+        items = self._items()
+        transport, _ = _make_hn_transport(items)
+        collector = HnCollector(
+            keywords=["AI", "LLM", "Claude"], concurrency=2, transport=transport
+        )
+
+        articles = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in articles] == [
+            "https://example.com/1",
+            "https://example.com/3",
+            "https://example.com/5",
+        ]
+        assert all(a.source == "Hacker News" for a in articles)
+
+    def test_max_storiesを超えるストーリーは取得しない(self):
+        items = self._items()
+        transport, requested = _make_hn_transport(items)
+        collector = HnCollector(keywords=["AI"], max_stories=2, transport=transport)
+
+        asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert sorted(p for p in requested if "/item/" in p) == [
+            "/v0/item/1.json",
+            "/v0/item/2.json",
+        ]
+
+    def test_一時的なエラーはリトライされる(self):
+        items = self._items()
+        transport, requested = _make_hn_transport(items, fail_counts={1: 2})
+        collector = HnCollector(keywords=["AI"], retries=2, retry_backoff=0, transport=transport)
+
+        articles = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert articles[0].url == "https://example.com/1"
+        assert requested.count("/v0/item/1.json") == 3
+
+    def test_リトライ上限を超えたストーリーはスキップされる(self):
+        items = self._items()
+        transport, _ = _make_hn_transport(items, fail_counts={1: 5})
+        collector = HnCollector(
+            keywords=["AI", "LLM"], retries=1, retry_backoff=0, transport=transport
+        )
+
+        articles = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in articles] == ["https://example.com/3"]
+
+
+class TestHnSeenItems:
+    def _items(self):
+        return {
+            1: {"title": "AI breakthrough", "url": "https://example.com/1", "type": "story"},
+            2: {"title": "Cooking tips", "url": "https://example.com/2", "type": "story"},
+            3: {"title": "New LLM released", "url": "https://example.com/3", "type": "story"},
+        }
+
+    def test_処理済みのストーリーは再取得しない(self, tmp_path):
+        with ArticleRepository(str(tmp_path / "articles.db")) as repo:
+            transport, requested = _make_hn_transport(self._items())
+            collector = HnCollector(keywords=["AI", "LLM"], transport=transport, seen_store=repo)
+
+            first = asyncio.run(collector.fetch_relevant_stories_async())
+            requested.clear()
+            second = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in first] == ["https://example.com/1", "https://example.com/3"]
+        assert second == []
+        assert requested == ["/v0/topstories.json"]
+
+    def test_取得に失敗したストーリーは次回再取得する(self, tmp_path):
+        with ArticleRepository(str(tmp_path / "articles.db")) as repo:
+            transport, requested = _make_hn_transport(self._items(), fail_counts={3: 1})
+            collector = HnCollector(
+                keywords=["AI", "LLM"],
+                retries=0,
+                retry_backoff=0,
+                transport=transport,
+                seen_store=repo,
+            )
+
+            asyncio.run(collector.fetch_relevant_stories_async())
+            requested.clear()
+            second = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in second] == ["https://example.com/3"]
+        assert requested == ["/v0/topstories.json", "/v0/item/3.json"]
+
+    def test_取得結果を確定するまで既読にしない(self, tmp_path):
+        with ArticleRepository(str(tmp_path / "articles.db")) as repo:
+            transport, _ = _make_hn_transport(self._items())
+            collector = HnCollector(keywords=["AI", "LLM"], transport=transport, seen_store=repo)
+
+            result = asyncio.run(collector.fetch_story_result_async())
+            assert repo.filter_unseen_items("hacker_news", [1, 2, 3]) == [1, 2, 3]
+
+            collector.commit(result)
+            assert repo.filter_unseen_items("hacker_news", [1, 2, 3]) == []
+        assert [a.url for a in result.articles] == [
+            "https://example.com/1",
+            "https://example.com/3",
+        ]
+
+    @patch("src.collector.hn_collector.httpx.get")
+    def test_同期取得でも既読ストーリーをスキップする(self, mock_get, tmp_path):
+        items = self._items()
+
+        def fake_get(url):
+            response = MagicMock()
+            if url.endswith("topstories.json"):
+                response.json.return_value = list(items)
+            else:
+                response.json.return_value = items[int(url.rsplit("/", 1)[-1][:-5])]
+            return response
+
+        mock_get.side_effect = fake_get
+        with ArticleRepository(str(tmp_path / "articles.db")) as repo:
+            repo.mark_items_seen("hacker_news", [1])
+            collector = HnCollector(keywords=["AI", "LLM"], seen_store=repo)
+
+            articles = collector.fetch_relevant_stories()
+
+            assert [a.url for a in articles] == ["https://example.com/3"]
+            assert repo.filter_unseen_items("hacker_news", [1, 2, 3]) == []
+
+
+class TestHnTitlePrefetch:
+    def _items(self):
+        return {
+            1: {"title": "AI breakthrough", "url": "https://example.com/1", "type": "story"},
+            2: {"title": "Cooking tips", "url": "https://example.com/2", "type": "story"},
+            3: {"title": "New LLM released", "url": "https://example.com/3", "type": "story"},
+            4: {"title": "Gardening said to help", "url": "https://example.com/4", "type": "story"},
+        }
+
+    def test_タイトルの事前取得で無関係なストーリーの詳細取得を省く(self):
+        transport, requested = _make_hn_transport(self._items())
+        collector = HnCollector(
+            keywords=["AI", "LLM"],
+            transport=transport,
+            title_prefetch_url="https://hn.algolia.com/api/v1/search",
+        )
+
+        articles = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in articles] == ["https://example.com/1", "https://example.com/3"]
+        assert sorted(p for p in requested if "/item/" in p) == [
+            "/v0/item/1.json",
+            "/v0/item/3.json",
+        ]
+
+    def test_事前取得できなかったストーリーは詳細を取得して判定する(self):
+        transport, requested = _make_hn_transport(self._items(), prefetch_missing={2, 3})
+        collector = HnCollector(
+            keywords=["AI", "LLM"],
+            transport=transport,
+            title_prefetch_url="https://hn.algolia.com/api/v1/search",
+        )
+
+        articles = asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert [a.url for a in articles] == ["https://example.com/1", "https://example.com/3"]
+        assert sorted(p for p in requested if "/item/" in p) == [
+            "/v0/item/1.json",
+            "/v0/item/2.json",
+            "/v0/item/3.json",
+        ]
+
+    def test_無関係と判定したストーリーは既読として記録する(self, tmp_path):
+        transport, requested = _make_hn_transport(self._items())
+        with ArticleRepository(str(tmp_path / "articles.db")) as repo:
+            collector = HnCollector(
+                keywords=["AI", "LLM"],
+                transport=transport,
+                seen_store=repo,
+                title_prefetch_url="https://hn.algolia.com/api/v1/search",
+            )
+            asyncio.run(collector.fetch_relevant_stories_async())
+
+            assert repo.filter_unseen_items("hacker_news", [1, 2, 3, 4]) == []
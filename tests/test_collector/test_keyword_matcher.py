@@ -0,0 +1,59 @@
+import pytest
+
+from src.collector.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    @pytest.fixture
+    def matcher(self):
+        return KeywordMatcher(["AI", "LLM", "machine learning", "GPT"])
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "New AI model released",
+            "ai safety report",
+            "LLMs are getting cheaper",
+            "Machine Learning trends",
+            "machine-learning pipelines",
+            "GPT-5 benchmarks",
+            "生成AIの最新動向",
+            "(AI) news",
+        ],
+    )
+    def test_単語境界でキーワードにマッチする(self, matcher, text):
+        assert matcher.matches(text) is True
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "He said the rain would stop",
+            "Maintenance window tonight",
+            "MAINTENANCE WINDOW",
+            "Cooking recipes",
+            "",
+            None,
+        ],
+    )
+    def test_単語の一部にはマッチしない(self, matcher, text):
+        assert matcher.matches(text) is False
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "OpenAI hires new CFO",
+            "ChatGPT adds memory",
+            "GenAI tooling roundup",
+            "OpenAIの新モデル",
+        ],
+    )
+    def test_CamelCaseの語境界でもマッチする(self, matcher, text):
+        assert matcher.matches(text) is True
+
+    def test_キーワードがなければ何にもマッチしない(self):
+        matcher = KeywordMatcher([])
+        assert not matcher
+        assert matcher.matches("AI") is False
+
+    def test_キーワードは小文字化して重複を除く(self):
+        assert KeywordMatcher(["AI", "ai", " LLM "]).keywords == ["ai", "llm"]
@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.collector.retry import RetryPolicy, request_with_retry, request_with_retry_async
+
+NO_WAIT = RetryPolicy(retries=2, backoff=0)
+
+
+def _responder(outcomes):
+    outcomes = list(outcomes)
+    calls = []
+
+    def send():
+        calls.append(len(calls))
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    return send, calls
+
+
+def _run_sync(outcomes, policy=NO_WAIT):
+    send, calls = _responder(outcomes)
+    retried = []
+    response = request_with_retry(send, policy, retried.append)
+    return response, calls, retried
+
+
+def _run_async(outcomes, policy=NO_WAIT):
+    send, calls = _responder(outcomes)
+    retried = []
+
+    async def send_async():
+        return send()
+
+    response = asyncio.run(request_with_retry_async(send_async, policy, retried.append))
+    return response, calls, retried
+
+
+@pytest.fixture(params=["sync", "async"])
+def run(request):
+    return _run_sync if request.param == "sync" else _run_async
+
+
+class TestRequestWithRetry:
+    def test_5xxとタイムアウトはリトライして成功を返す(self, run):
+        response, calls, retried = run([503, httpx.ReadTimeout("timeout"), 200])
+
+        assert response.status_code == 200
+        assert len(calls) == 3
+        assert retried == [0, 1]
+
+    def test_リトライ対象外のステータスはそのまま返す(self, run):
+        response, calls, _ = run([404])
+
+        assert response.status_code == 404
+        assert len(calls) == 1
+
+    def test_上限に達したら最後の応答を返す(self, run):
+        response, calls, _ = run([500, 502, 503])
+
+        assert response.status_code == 503
+        assert len(calls) == 3
+
+    def test_上限に達したタイムアウトは送出する(self, run):
+        with pytest.raises(httpx.ReadTimeout):
+            run([httpx.ReadTimeout("timeout")] * 3)
+
+    def test_同期と非同期で同じ間隔で待つ(self):
+        policy = RetryPolicy(retries=2, backoff=0.5)
+        with patch("src.collector.retry.time.sleep") as sleep:
+            _run_sync([500, 500, 200], policy)
+
+        async def no_wait(delay):
+            delays.append(delay)
+
+        delays = []
+        with patch("src.collector.retry.asyncio.sleep", no_wait):
+            _run_async([500, 500, 200], policy)
+
+        assert [call.args[0] for call in sleep.call_args_list] == delays == [0.5, 1.0]
@@ -1,7 +1,28 @@
+import dataclasses
 import json
 from unittest.mock import MagicMock, patch
 
-from src.collector.rss_collector import Article, RssCollector, load_feed_config
+import httpx
+import pytest
+
+from src.collector.keyword_matcher import KeywordMatcher
+from src.collector.rss_collector import Article, RssCollector, load_feed_config, main
+from src.db.article_repository import ArticleRepository
+
+
+def _rss_xml(*items):
+    body = "".join(
+        f"<item><title>{title}</title><link>{link}</link>"
+        f"<description>{title} summary</description></item>"
+        for title, link in items
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{body}</channel></rss>'
+    )
+
+
+def _ok_transport():
+    return httpx.MockTransport(lambda request: httpx.Response(200, content=b""))
 
 
 class TestLoadFeedConfig:
@@ -45,7 +66,7 @@ class TestRssCollector:
         feed.feed.get = lambda k, default="": default
         return feed
 
-    @patch("src.collector.rss_collector.feedparser.parse")
+    @patch("feedparser.parse")
     def test_RSSフィードから記事を取得できる(self, mock_parse):
         entries = [
             self._make_feed_entry("AI News 1", "https://example.com/1", "Summary 1", "2026-01-01"),
@@ -53,7 +74,7 @@ class TestRssCollector:
         ]
         mock_parse.return_value = self._make_parsed_feed(entries)
 
-        collector = RssCollector()
+        collector = RssCollector(transport=_ok_transport())
         articles = collector.fetch_feed("https://example.com/feed", "TestSource")
 
         assert len(articles) == 2
@@ -61,16 +82,16 @@ class TestRssCollector:
         assert articles[0].url == "https://example.com/1"
         assert articles[0].source == "TestSource"
 
-    @patch("src.collector.rss_collector.feedparser.parse")
+    @patch("feedparser.parse")
     def test_不正なフィードは空リストを返す(self, mock_parse):
         mock_parse.return_value = self._make_parsed_feed([], status=404, bozo=True)
 
-        collector = RssCollector()
+        collector = RssCollector(transport=_ok_transport())
         articles = collector.fetch_feed("https://invalid.com/feed", "Bad")
 
         assert articles == []
 
-    @patch("src.collector.rss_collector.feedparser.parse")
+    @patch("feedparser.parse")
     def test_複数フィードからまとめて取得できる(self, mock_parse):
         entries = [self._make_feed_entry("Article", "https://a.com/1", "Sum", "2026-01-01")]
         mock_parse.return_value = self._make_parsed_feed(entries)
@@ -79,13 +100,13 @@ class TestRssCollector:
             {"name": "Feed1", "url": "https://a.com/feed", "category": "test"},
             {"name": "Feed2", "url": "https://b.com/feed", "category": "test"},
         ]
-        collector = RssCollector()
+        collector = RssCollector(transport=_ok_transport())
         articles = collector.fetch_all_feeds(feeds)
 
         assert len(articles) == 2  # 1 article per feed x 2 feeds
 
     def test_フィードURL検証で有効なURLリストを返す(self):
-        collector = RssCollector()
+        collector = RssCollector(retry_backoff=0)
         results = collector.validate_feed_urls(
             [
                 {"name": "Good", "url": "https://example.com/feed", "category": "test"},
@@ -95,6 +116,286 @@ class TestRssCollector:
         assert "name" in results[0]
 
 
+class TestRssCollectorConditionalGet:
+    def _make_transport(self, feeds, requests):
+        def handler(request):
+            requests.append(request)
+            etag = f'"{request.url.host}-v1"'
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                content=feeds[request.url.host].encode(),
+                headers={
+                    "ETag": etag,
+                    "Last-Modified": "Wed, 01 Jan 2026 00:00:00 GMT",
+                    "Content-Type": "application/rss+xml",
+                },
+            )
+
+        return httpx.MockTransport(handler)
+
+    def _feeds(self):
+        return {
+            "a.com": _rss_xml(("A1", "https://a.com/1"), ("A2", "https://a.com/2")),
+            "b.com": _rss_xml(("B1", "https://b.com/1")),
+        }
+
+    def _feed_config(self):
+        return [
+            {"name": "FeedA", "url": "https://a.com/feed", "category": "test"},
+            {"name": "FeedB", "url": "https://b.com/feed", "category": "test"},
+        ]
+
+    def test_並列取得でもフィード順に記事を返す(self):
+        requests = []
+        collector = RssCollector(transport=self._make_transport(self._feeds(), requests))
+
+        articles = collector.fetch_all_feeds(self._feed_config())
+
+        assert [a.url for a in articles] == [
+            "https://a.com/1",
+            "https://a.com/2",
+            "https://b.com/1",
+        ]
+        assert [a.source for a in articles] == ["FeedA", "FeedA", "FeedB"]
+
+    def test_未更新のフィードは304でパースをスキップする(self):
+        requests = []
+        collector = RssCollector(transport=self._make_transport(self._feeds(), requests))
+        collector.fetch_all_feeds(self._feed_config())
+
+        with patch("feedparser.parse") as mock_parse:
+            articles = collector.fetch_all_feeds(self._feed_config())
+
+        assert articles == []
+        mock_parse.assert_not_called()
+        second_run = requests[2:]
+        assert all(r.headers["if-none-match"] for r in second_run)
+        assert all(r.headers["if-modified-since"] for r in second_run)
+
+    def test_キャッシュはファイルに保存され再起動後も使われる(self, tmp_path):
+        cache_path = str(tmp_path / "feed_cache.json")
+        requests = []
+        transport = self._make_transport(self._feeds(), requests)
+        RssCollector(cache_path=cache_path, transport=transport).fetch_all_feeds(
+            self._feed_config()
+        )
+
+        cached = json.loads((tmp_path / "feed_cache.json").read_text())
+        assert cached["https://a.com/feed"]["etag"] == '"a.com-v1"'
+
+        collector = RssCollector(cache_path=cache_path, transport=transport)
+        assert collector.fetch_all_feeds(self._feed_config()) == []
+
+    def test_一時的な5xxとタイムアウトはリトライする(self):
+        outcomes = [httpx.ReadTimeout("timeout"), httpx.Response(503)]
+
+        def handler(request):
+            if outcomes:
+                outcome = outcomes.pop(0)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+            return httpx.Response(
+                200,
+                content=self._feeds()["a.com"].encode(),
+                headers={"Content-Type": "application/rss+xml"},
+            )
+
+        collector = RssCollector(transport=httpx.MockTransport(handler), retry_backoff=0)
+
+        result = collector.fetch_feed_result("https://a.com/feed", "FeedA")
+
+        assert result.error is None
+        assert [a.url for a in result.articles] == ["https://a.com/1", "https://a.com/2"]
+
+    def test_HTTPエラーのフィードは空リストを返す(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(500))
+        collector = RssCollector(transport=transport, retry_backoff=0)
+
+        assert collector.fetch_feed("https://a.com/feed", "FeedA") == []
+        assert collector.feed_cache == {}
+
+
+class TestFeedHealth:
+    def _make_transport(self, requests):
+        feeds = {
+            "a.com": _rss_xml(("A1", "https://a.com/1"), ("A2", "https://a.com/2")),
+            "b.com": "<html>not a feed</html>",
+        }
+
+        def handler(request):
+            requests.append(request)
+            if request.url.host == "down.com":
+                return httpx.Response(503)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                content=feeds[request.url.host].encode(),
+                headers={"ETag": '"v1"', "Content-Type": "application/rss+xml"},
+            )
+
+        return httpx.MockTransport(handler)
+
+    def _feed_config(self):
+        return [
+            {"name": "FeedA", "url": "https://a.com/feed", "category": "test"},
+            {"name": "FeedB", "url": "https://b.com/feed", "category": "test"},
+            {"name": "FeedDown", "url": "https://down.com/feed", "category": "test"},
+        ]
+
+    def test_記事取得と同じリクエストでヘルス情報が得られる(self):
+        requests = []
+        collector = RssCollector(transport=self._make_transport(requests), retries=0)
+
+        results = collector.fetch_feed_results(self._feed_config())
+
+        assert len(requests) == 3
+        a, b, down = (r.health() for r in results)
+        assert [x.url for x in results[0].articles] == ["https://a.com/1", "https://a.com/2"]
+        assert a["valid"] is True
+        assert a["entry_count"] == 2
+        assert a["status"] == 200
+        assert a["bytes"] > 0
+        assert a["latency"] >= 0
+        assert b["valid"] is False
+        assert down["valid"] is False
+        assert down["status"] == 503
+
+    def test_304のフィードは前回のエントリ数で有効と判定される(self):
+        requests = []
+        collector = RssCollector(transport=self._make_transport(requests), retry_backoff=0)
+        collector.fetch_feed_results(self._feed_config()[:1])
+
+        result = collector.fetch_feed_results(self._feed_config()[:1])[0]
+
+        assert result.not_modified is True
+        assert result.articles == []
+        assert result.health()["valid"] is True
+        assert result.health()["entry_count"] == 2
+
+    def test_単独のヘルスチェックは条件付きGETのキャッシュを消費しない(self):
+        requests = []
+        collector = RssCollector(transport=self._make_transport(requests), retry_backoff=0)
+
+        results = collector.validate_feed_urls(self._feed_config())
+
+        assert [r["valid"] for r in results] == [True, False, False]
+        assert collector.feed_cache == {}
+        assert len(collector.fetch_feed_results(self._feed_config())[0].articles) == 2
+
+    def test_ヘルスチェックコマンドはJSON行を出力し無効なフィードで失敗する(self, tmp_path, capsys):
+        config_file = tmp_path / "feeds.json"
+        config_file.write_text(json.dumps({"rss_feeds": self._feed_config()[:1]}))
+        requests = []
+        transport = self._make_transport(requests)
+
+        with patch(
+            "src.collector.rss_collector.RssCollector",
+            lambda **kwargs: RssCollector(transport=transport, retry_backoff=0, **kwargs),
+        ):
+            exit_code = main(["--config", str(config_file)])
+
+        lines = capsys.readouterr().out.strip().splitlines()
+        assert exit_code == 0
+        assert json.loads(lines[0])["name"] == "FeedA"
+
+        config_file.write_text(json.dumps({"rss_feeds": self._feed_config()}))
+        with patch(
+            "src.collector.rss_collector.RssCollector",
+            lambda **kwargs: RssCollector(transport=transport, retry_backoff=0, **kwargs),
+        ):
+            assert main(["--config", str(config_file)]) == 1
+
+
+class TestRssWatermarks:
+    def _feed(self, *items):
+        body = "".join(
+            f"<item><title>{guid}</title><link>https://a.com/{guid}</link>"
+            f"<guid>{guid}</guid><pubDate>{published}</pubDate></item>"
+            for guid, published in items
+        )
+        return f'<rss version="2.0"><channel><title>T</title>{body}</channel></rss>'
+
+    def _collector(self, tmp_path, feeds):
+        def handler(request):
+            return httpx.Response(
+                200, content=feeds.pop(0).encode(), headers={"Content-Type": "application/rss+xml"}
+            )
+
+        repo = ArticleRepository(str(tmp_path / "articles.db"))
+        return RssCollector(transport=httpx.MockTransport(handler), watermarks=repo), repo
+
+    def test_前回のウォーターマーク以降の記事だけを返す(self, tmp_path):
+        first = self._feed(
+            ("g2", "Fri, 02 Jan 2026 00:00:00 GMT"), ("g1", "Thu, 01 Jan 2026 00:00:00 GMT")
+        )
+        second = self._feed(
+            ("g3", "Sat, 03 Jan 2026 00:00:00 GMT"),
+            ("g2", "Fri, 02 Jan 2026 00:00:00 GMT"),
+            ("g1", "Thu, 01 Jan 2026 00:00:00 GMT"),
+        )
+        collector, repo = self._collector(tmp_path, [first, second])
+
+        assert [a.title for a in collector.fetch_feed("https://a.com/feed", "A")] == ["g2", "g1"]
+        assert [a.title for a in collector.fetch_feed("https://a.com/feed", "A")] == ["g3"]
+        assert repo.get_watermark("https://a.com/feed")["guid"] == "g3"
+        repo.close()
+
+    def test_GUIDが消えても公開日時より古い記事は除外される(self, tmp_path):
+        first = self._feed(("g2", "Fri, 02 Jan 2026 00:00:00 GMT"))
+        second = self._feed(
+            ("g4", "Sun, 04 Jan 2026 00:00:00 GMT"), ("g1", "Thu, 01 Jan 2026 00:00:00 GMT")
+        )
+        collector, repo = self._collector(tmp_path, [first, second])
+        collector.fetch_feed("https://a.com/feed", "A")
+
+        assert [a.title for a in collector.fetch_feed("https://a.com/feed", "A")] == ["g4"]
+        repo.close()
+
+    def test_取得結果を確定するまでウォーターマークとキャッシュを更新しない(self, tmp_path):
+        feed = self._feed(("g1", "Thu, 01 Jan 2026 00:00:00 GMT"))
+        collector, repo = self._collector(tmp_path, [feed, feed])
+
+        result = collector.fetch_feed_result("https://a.com/feed", "A")
+        assert repo.get_watermark("https://a.com/feed") is None
+        assert collector.fetch_feed_result("https://a.com/feed", "A").articles == result.articles
+
+        collector.commit(result)
+        assert repo.get_watermark("https://a.com/feed")["guid"] == "g1"
+        repo.close()
+
+    def test_ヘルスチェックはウォーターマークを更新しない(self, tmp_path):
+        feed = self._feed(("g1", "Thu, 01 Jan 2026 00:00:00 GMT"))
+        collector, repo = self._collector(tmp_path, [feed])
+
+        collector.validate_feed_urls([{"name": "A", "url": "https://a.com/feed"}])
+
+        assert repo.get_watermark("https://a.com/feed") is None
+        repo.close()
+
+
+class TestRssKeywordFilter:
+    def test_キーワードに一致しないエントリは除外される(self):
+        feed = _rss_xml(
+            ("New LLM serving engine", "https://a.com/1"),
+            ("Quarterly earnings said to rise", "https://a.com/2"),
+        )
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, content=feed.encode(), headers={"Content-Type": "application/rss+xml"}
+            )
+        )
+        collector = RssCollector(transport=transport, matcher=KeywordMatcher(["AI", "LLM"]))
+
+        result = collector.fetch_feed_result("https://a.com/feed", "A")
+
+        assert [a.url for a in result.articles] == ["https://a.com/1"]
+        assert result.entry_count == 2
+
+
 class TestArticle:
     def test_Articleデータクラスのフィールド(self):
         article = Article(
@@ -106,3 +407,10 @@ class TestArticle:
         )
         assert article.title == "Test"
         assert article.source == "TestSource"
+
+    def test_不変でスロットを使う(self):
+        article = Article("t", "https://a.com", "s", "src", "")
+        assert not hasattr(article, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            article.title = "x"
+        assert article.id is None
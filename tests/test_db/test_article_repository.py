@@ -1,15 +1,23 @@
+import json
 import sqlite3
 
 import pytest
 
 from src.collector.rss_collector import Article
-from src.db.article_repository import ArticleRepository
+from src.db.archive import archive_months, iter_archive
+from src.db.article_repository import (
+    CREATE_TABLE_SQL,
+    SCHEMA_VERSION,
+    ArticleRepository,
+    main,
+)
 
 
 @pytest.fixture
 def repo(tmp_path):
     db_path = str(tmp_path / "test.db")
-    return ArticleRepository(db_path)
+    with ArticleRepository(db_path) as repository:
+        yield repository
 
 
 class TestArticleRepository:
@@ -95,3 +103,534 @@ class TestArticleRepository:
     def test_存在しないURLの要約更新は何も起きない(self, repo):
         repo.update_summary("https://nonexistent.com", "要約テキスト")
         assert len(repo.get_all()) == 0
+
+    def test_一括保存は同一バッチ内の重複URLも除外して件数を返す(self, repo):
+        articles = [
+            Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01"),
+            Article("A1 again", "https://a.com/1", "S1", "Src1", "2026-01-01"),
+            Article("A2", "https://a.com/2", "S2", "Src2", "2026-01-02"),
+        ]
+        assert repo.save_many(articles) == 2
+        assert repo.save_many(articles) == 0
+        assert repo.save_many([]) == 0
+        assert len(repo.get_all()) == 2
+
+    def test_保存結果は別の接続から参照できる(self, repo):
+        repo.save_many([Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01")])
+        conn = sqlite3.connect(repo.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 1
+        conn.close()
+
+    def test_WALモードで接続を使い回す(self, repo):
+        conn = repo._conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        repo.save(Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01"))
+        repo.get_all()
+        assert repo._conn is conn
+
+    def test_大量の記事を一括保存できる(self, repo):
+        articles = [
+            Article(f"T{i}", f"https://a.com/{i}", "S", "Src", "2026-01-01") for i in range(10_000)
+        ]
+        assert repo.save_many(articles) == 10_000
+        assert repo.save_many(articles[:10] + [Article("N", "https://a.com/new", "", "S", "")]) == 1
+
+    def test_要約結果をまとめて書き戻せる(self, repo):
+        repo.save_many(
+            [
+                Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01"),
+                Article("A2", "https://a.com/2", "S2", "Src2", "2026-01-02"),
+                Article("A3", "https://a.com/3", "S3", "Src3", "2026-01-03"),
+            ]
+        )
+        results = [
+            {"url": "https://a.com/1", "summary": "要約1"},
+            {"url": "https://a.com/2", "summary": None, "error": "API Error"},
+            {"url": "https://a.com/3", "summary": "要約3"},
+            {"url": "https://a.com/missing", "summary": "要約"},
+        ]
+
+        assert repo.save_summaries(results) == 2
+
+        unsummarized = repo.get_unsummarized()
+        assert [row["url"] for row in unsummarized] == ["https://a.com/2"]
+        assert unsummarized[0]["summary"] == "S2"
+        summaries = {row["url"]: row["summary"] for row in repo.get_all()}
+        assert summaries["https://a.com/1"] == "要約1"
+        assert summaries["https://a.com/3"] == "要約3"
+
+    def test_要約の書き戻しは途中で失敗すると全件ロールバックされる(self, repo):
+        repo.save_many(
+            [
+                Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01"),
+                Article("A2", "https://a.com/2", "S2", "Src2", "2026-01-02"),
+            ]
+        )
+        results = [
+            {"url": "https://a.com/1", "summary": "要約1"},
+            {"url": "https://a.com/2", "summary": {"not": "text"}},
+        ]
+
+        with pytest.raises(sqlite3.Error):
+            repo.save_summaries(results)
+
+        assert len(repo.get_unsummarized()) == 2
+
+    def test_書き戻し対象がなければ0件(self, repo):
+        assert repo.save_summaries([]) == 0
+        assert repo.save_summaries([{"url": "https://a.com/1", "summary": None, "error": "x"}]) == 0
+
+
+class TestNearDuplicateDetection:
+    BODY = (
+        "Databricks announced a new serverless vector search service that integrates with "
+        "Unity Catalog and lets data engineers build retrieval augmented generation pipelines "
+        "without managing infrastructure, with pricing based on usage and support for "
+        "automatic index synchronization from Delta tables."
+    )
+
+    def test_トラッキングパラメータ違いのURLは重複として除外される(self, repo):
+        repo.save(Article("A1", "https://example.com/post", "S1", "RSS", ""))
+        saved = repo.save_many(
+            [
+                Article("A1", "http://www.example.com/post/?utm_source=hn", "S1", "HN", ""),
+                Article("A2", "https://example.com/other", "S2", "RSS", ""),
+            ]
+        )
+        assert saved == 1
+        assert repo.exists("https://example.com/post?utm_medium=email") is True
+
+    def test_別サイトに転載された記事は重複として除外される(self, repo):
+        repo.save(
+            Article("Vector search GA", "https://databricks.com/blog/a", self.BODY, "RSS", "")
+        )
+        syndicated = Article(
+            "Vector Search GA",
+            "https://news.example.org/databricks-vector-search",
+            f"<p>{self.BODY}</p> Continue reading.",
+            "Hacker News",
+            "",
+        )
+
+        assert repo.find_duplicate(syndicated)["url"] == "https://databricks.com/blog/a"
+        assert repo.save(syndicated) is False
+        assert len(repo.get_all()) == 1
+
+    def test_同一バッチ内の転載も除外される(self, repo):
+        articles = [
+            Article("Vector search GA", "https://databricks.com/blog/a", self.BODY, "RSS", ""),
+            Article("Vector search GA", "https://mirror.org/a", self.BODY + " Via RSS.", "RSS", ""),
+        ]
+        assert repo.save_many(articles) == 1
+
+    def test_同一バッチ内の正規化URLの重複も除外される(self, repo):
+        articles = [
+            Article("A1", "https://example.com/post", "S1", "RSS", ""),
+            Article("A1", "https://www.example.com/post/?utm_source=hn", "S1", "HN", ""),
+        ]
+        assert [a.url for a in repo.save_new(articles)] == ["https://example.com/post"]
+
+    def test_重複判定の問い合わせは記事数に比例しない(self, repo):
+        repo.save_many([Article(f"T{i}", f"https://a.com/{i}", self.BODY, "RSS", "") for i in [0]])
+        statements = []
+        repo._conn.set_trace_callback(statements.append)
+        articles = [
+            Article(f"T{i}", f"https://b.com/{i}", f"{self.BODY} {i}", "RSS", "")
+            for i in range(200)
+        ]
+        repo.save_many(articles)
+        repo._conn.set_trace_callback(None)
+
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        assert len(selects) <= 20
+
+    def test_重複のない記事はNoneを返す(self, repo):
+        repo.save(
+            Article("Vector search GA", "https://databricks.com/blog/a", self.BODY, "RSS", "")
+        )
+        assert repo.find_duplicate(Article("Other", "https://b.com/1", "short", "RSS", "")) is None
+
+    def test_既存DBの記事はマイグレーションでフィンガープリントが作られる(self, tmp_path):
+        db_path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(CREATE_TABLE_SQL)
+        conn.execute(
+            "INSERT INTO articles (title, url, summary, source) VALUES (?, ?, ?, ?)",
+            ("Old", "https://old.com/post", self.BODY, "Src"),
+        )
+        conn.commit()
+        conn.close()
+
+        with ArticleRepository(db_path) as repository:
+            assert (
+                repository.save(Article("Old", "https://www.old.com/post/", "", "S", "")) is False
+            )
+            copy = Article("Copy", "https://copy.com/x", self.BODY, "S", "")
+            assert repository.find_duplicate(copy)["url"] == "https://old.com/post"
+
+
+class TestSourceWatermarks:
+    def test_ウォーターマークを保存し更新できる(self, repo):
+        assert repo.get_watermark("https://a.com/feed") is None
+        repo.set_watermark("https://a.com/feed", {"guid": "g1", "published_at": 100})
+        repo.set_watermark("https://a.com/feed", {"guid": "g2", "published_at": 200})
+        assert repo.get_watermark("https://a.com/feed") == {"guid": "g2", "published_at": 200}
+
+    def test_既読アイテムを除外できる(self, repo):
+        repo.mark_items_seen("hacker_news", [1, 2, 3])
+        assert repo.filter_unseen_items("hacker_news", [3, 4, 1, 5]) == [4, 5]
+        assert repo.filter_unseen_items("other", [1]) == [1]
+
+    def test_大量のIDでも既読判定できる(self, repo):
+        repo.mark_items_seen("hacker_news", list(range(0, 2000, 2)))
+        assert repo.filter_unseen_items("hacker_news", list(range(2000))) == list(range(1, 2000, 2))
+
+    def test_古い既読アイテムを削除できる(self, repo):
+        repo.mark_items_seen("hacker_news", [1, 2])
+        with repo._conn:
+            repo._conn.execute(
+                "UPDATE seen_items SET seen_at = datetime('now', '-10 days') WHERE item_id = '1'"
+            )
+        assert repo.prune_seen_items(older_than_days=7) == 1
+        assert repo.filter_unseen_items("hacker_news", [1, 2]) == [1]
+
+
+class TestPublishedState:
+    def _save(self, repo, urls):
+        repo.save_many(
+            [Article(title=url, url=url, summary="", source="Test", published="") for url in urls]
+        )
+
+    def test_要約済みかつ未投稿の記事だけを返す(self, repo):
+        self._save(repo, ["https://a.com/1", "https://a.com/2", "https://a.com/3"])
+        repo.save_summaries(
+            [
+                {"url": "https://a.com/1", "summary": "s1"},
+                {"url": "https://a.com/2", "summary": "s2"},
+            ]
+        )
+        repo.mark_as_published(["https://a.com/1"])
+
+        assert [row["url"] for row in repo.get_unpublished()] == ["https://a.com/2"]
+
+    def test_投稿済みにすると日時が記録され二重には更新しない(self, repo):
+        self._save(repo, ["https://a.com/1"])
+        repo.save_summaries([{"url": "https://a.com/1", "summary": "s1"}])
+
+        assert repo.mark_as_published(["https://a.com/1", "https://a.com/1"]) == 1
+        assert repo.mark_as_published(["https://a.com/1"]) == 0
+        row = repo.get_all(columns=["is_published", "published_at"])[0]
+        assert row["is_published"] == 1
+        assert row["published_at"] is not None
+
+
+class TestStreamingReads:
+    @pytest.fixture
+    def filled_repo(self, repo):
+        repo.save_many(
+            [Article(f"A{i}", f"https://a.com/{i}", f"S{i}", "Src", "") for i in range(7)]
+        )
+        return repo
+
+    def test_ページングしながら全件を新しい順に返す(self, filled_repo):
+        rows = list(filled_repo.iter_all(page_size=2))
+        assert [row["url"] for row in rows] == [f"https://a.com/{i}" for i in reversed(range(7))]
+        assert rows == filled_repo.get_all()
+
+    def test_件数上限を指定できる(self, filled_repo):
+        assert len(filled_repo.get_all(limit=3)) == 3
+        assert len(list(filled_repo.iter_all(limit=5, page_size=2))) == 5
+
+    def test_必要なカラムだけを取得できる(self, filled_repo):
+        rows = filled_repo.get_unsummarized(columns=["url", "title"], limit=1)
+        assert rows == [{"url": "https://a.com/6", "title": "A6"}]
+
+    def test_不明なカラムはValueError(self, filled_repo):
+        with pytest.raises(ValueError):
+            list(filled_repo.iter_all(columns=["url; DROP TABLE articles"]))
+
+    def test_カーソル以降から続きを取得できる(self, filled_repo):
+        first_page = filled_repo.get_all(limit=3)
+        cursor = (first_page[-1]["created_at"], first_page[-1]["id"])
+        rest = list(filled_repo.iter_all(after=cursor))
+        assert [row["url"] for row in rest] == [f"https://a.com/{i}" for i in reversed(range(4))]
+
+    def test_走査中に要約済みへ更新しても取りこぼさない(self, filled_repo):
+        seen = []
+        for row in filled_repo.iter_unsummarized(page_size=2):
+            seen.append(row["url"])
+            filled_repo.mark_as_summarized(row["url"])
+        assert len(seen) == 7
+        assert filled_repo.get_unsummarized() == []
+
+    def test_行をArticleとして直接取得できる(self, filled_repo):
+        articles = list(filled_repo.iter_articles(page_size=2))
+        rows = filled_repo.get_all()
+        assert [a.url for a in articles] == [row["url"] for row in rows]
+        assert articles[0].id == rows[0]["id"]
+        assert articles[0].created_at == rows[0]["created_at"]
+        assert articles[0].is_summarized is False
+
+    def test_未要約の記事をArticleとして取得できる(self, filled_repo):
+        filled_repo.mark_as_summarized("https://a.com/6")
+        articles = list(filled_repo.iter_unsummarized_articles(limit=2))
+        assert [a.url for a in articles] == ["https://a.com/5", "https://a.com/4"]
+
+
+class TestFullTextSearch:
+    @pytest.fixture
+    def search_repo(self, repo):
+        repo.save_many(
+            [
+                Article(
+                    "Vector search at scale",
+                    "https://a.com/1",
+                    "ベクトル検索のスケーリングについてAIの観点から解説します",
+                    "AWS Blog",
+                    "",
+                ),
+                Article(
+                    "Lakehouse governance",
+                    "https://a.com/2",
+                    "Databricks の Unity Catalog で vector index を管理する",
+                    "Databricks Blog",
+                    "",
+                ),
+                Article("Cooking recipes", "https://a.com/3", "今日の料理", "Food", ""),
+            ]
+        )
+        return repo
+
+    def test_タイトル一致を本文一致より上位に返す(self, search_repo):
+        results = search_repo.search("vector")
+        assert [r["url"] for r in results] == ["https://a.com/1", "https://a.com/2"]
+        assert "[Vector]" in results[0]["snippet"]
+
+    def test_日本語の要約を検索できる(self, search_repo):
+        results = search_repo.search("ベクトル検索")
+        assert [r["url"] for r in results] == ["https://a.com/1"]
+        assert "[ベクトル検索]" in results[0]["snippet"]
+
+    def test_複数語はすべてを含む記事に絞り込む(self, search_repo):
+        assert [r["url"] for r in search_repo.search("vector catalog")] == ["https://a.com/2"]
+
+    def test_短い英数字の語は単語単位で索引から絞り込む(self, search_repo):
+        search_repo.save_many(
+            [
+                Article("He said it rains", "https://a.com/4", "", "News", ""),
+                Article("OpenAI releases Go SDK", "https://a.com/5", "", "News", ""),
+            ]
+        )
+        results = search_repo.search("AI")
+        assert [r["url"] for r in results] == ["https://a.com/5", "https://a.com/1"]
+        assert "[AI]" in results[1]["snippet"]
+        assert [r["url"] for r in search_repo.search("go sdk")] == ["https://a.com/5"]
+
+    def test_出現数の多い短い語も新しい順に返す(self, search_repo, monkeypatch):
+        monkeypatch.setattr("src.db.article_repository.SEARCH_TERM_DRIVE_LIMIT", 1)
+        search_repo.save(Article("AI weekly", "https://a.com/4", "", "News", ""))
+        assert [r["url"] for r in search_repo.search("AI")] == [
+            "https://a.com/4",
+            "https://a.com/1",
+        ]
+
+    def test_短い日本語は部分一致で絞り込む(self, search_repo):
+        results = search_repo.search("料理")
+        assert [r["url"] for r in results] == ["https://a.com/3"]
+        assert "[料理]" in results[0]["snippet"]
+
+    def test_ページングできる(self, search_repo):
+        assert len(search_repo.search("vector", limit=1)) == 1
+        assert [r["url"] for r in search_repo.search("vector", limit=1, offset=1)] == [
+            "https://a.com/2"
+        ]
+
+    def test_要約の更新と削除が索引に反映される(self, search_repo):
+        search_repo.save_summaries([{"url": "https://a.com/3", "summary": "Iceberg の新機能"}])
+        assert [r["url"] for r in search_repo.search("iceberg")] == ["https://a.com/3"]
+        assert search_repo.search("料理") == []
+        with search_repo._conn:
+            search_repo._conn.execute("DELETE FROM articles WHERE url = 'https://a.com/3'")
+        assert search_repo.search("iceberg") == []
+
+    def test_要約の更新とアーカイブが短い語の索引に反映される(self, search_repo, tmp_path):
+        search_repo.save_summaries([{"url": "https://a.com/3", "summary": "Go の新機能"}])
+        assert [r["url"] for r in search_repo.search("go")] == ["https://a.com/3"]
+        search_repo.update_summary("https://a.com/3", "今日の料理")
+        assert search_repo.search("go") == []
+
+        with search_repo._conn:
+            search_repo._conn.execute("UPDATE articles SET created_at = '2000-01-01'")
+        search_repo.archive_older_than(30, str(tmp_path / "archive"))
+        assert (
+            search_repo._conn.execute("SELECT COUNT(*) FROM article_search_terms").fetchone()[0]
+            == 0
+        )
+
+    def test_索引を再構築できる(self, search_repo):
+        with search_repo._conn:
+            search_repo._conn.execute("DROP TRIGGER articles_fts_insert")
+        search_repo.save(Article("Streaming joins", "https://a.com/4", "", "Blog", ""))
+        assert search_repo.search("streaming") == []
+        with search_repo._conn:
+            search_repo._conn.execute("DELETE FROM article_search_terms")
+        search_repo.rebuild_search_index()
+        assert [r["url"] for r in search_repo.search("streaming")] == ["https://a.com/4"]
+        assert [r["url"] for r in search_repo.search("AI")] == ["https://a.com/1"]
+
+    def test_空のクエリは空リスト(self, search_repo):
+        assert search_repo.search("  ") == []
+
+    def test_コマンドから検索と再構築ができる(self, search_repo, capsys):
+        assert main(["--db", search_repo.db_path, "rebuild-search-index"]) == 0
+        assert main(["--db", search_repo.db_path, "search", "lakehouse"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)["url"] for line in lines] == ["https://a.com/2"]
+
+
+class TestArchive:
+    @pytest.fixture
+    def aged_repo(self, repo):
+        def body(n):
+            return " ".join(f"word{n}x{i}" for i in range(2000))
+
+        repo.save_many(
+            [
+                Article("Old 1", "https://a.com/1?utm_source=x", body(1), "Blog", ""),
+                Article("Old 2", "https://a.com/2", body(2), "Blog", ""),
+                Article("Older", "https://a.com/3", body(3), "Blog", ""),
+                Article("New", "https://a.com/4", "新しい記事", "Blog", ""),
+            ]
+        )
+        with repo._conn:
+            repo._conn.execute(
+                "UPDATE articles SET created_at = '2025-01-15 09:00:00' WHERE url LIKE '%/1%' "
+                "OR url LIKE '%/2'"
+            )
+            repo._conn.execute(
+                "UPDATE articles SET created_at = '2024-12-31 23:00:00' WHERE url LIKE '%/3'"
+            )
+        return repo
+
+    def test_古い記事を月別の圧縮ファイルに移す(self, aged_repo, tmp_path):
+        archive_dir = str(tmp_path / "archive")
+        assert aged_repo.archive_older_than(30, archive_dir) == 3
+
+        assert [r["url"] for r in aged_repo.get_all()] == ["https://a.com/4"]
+        assert archive_months(archive_dir) == ["2024-12", "2025-01"]
+        records = list(iter_archive(archive_dir))
+        assert [r["title"] for r in records] == ["Older", "Old 1", "Old 2"]
+        assert records[0]["summary"].startswith("word3x0")
+        assert [r["title"] for r in iter_archive(archive_dir, start_month="2025-01")] == [
+            "Old 1",
+            "Old 2",
+        ]
+
+    def test_アーカイブ済みのURLも既知として扱う(self, aged_repo, tmp_path):
+        aged_repo.archive_older_than(30, str(tmp_path / "archive"))
+
+        assert aged_repo.exists("https://a.com/2")
+        assert aged_repo.exists("https://www.a.com/1")
+        assert not aged_repo.exists("https://a.com/5")
+        assert aged_repo.save(Article("Old 2 again", "https://a.com/2/", "", "Blog", "")) is False
+        assert aged_repo.search("word1x1") == []
+
+    def test_追記しても既存のアーカイブを読める(self, aged_repo, tmp_path):
+        archive_dir = str(tmp_path / "archive")
+        aged_repo.archive_older_than(30, archive_dir, batch_size=1)
+        aged_repo.save(Article("Late", "https://a.com/6", "", "Blog", ""))
+        with aged_repo._conn:
+            aged_repo._conn.execute(
+                "UPDATE articles SET created_at = '2025-01-20 00:00:00' WHERE url LIKE '%/6'"
+            )
+        aged_repo.archive_older_than(30, archive_dir)
+
+        titles = [r["title"] for r in iter_archive(archive_dir, "2025-01", "2025-01")]
+        assert titles == ["Old 1", "Old 2", "Late"]
+
+    def test_圧縮で空き領域を回収する(self, aged_repo, tmp_path):
+        def pragma(name):
+            return aged_repo._conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        aged_repo.compact()
+        assert pragma("auto_vacuum") == 2
+        before = pragma("page_count")
+        aged_repo.archive_older_than(30, str(tmp_path / "archive"))
+        assert pragma("freelist_count") > 0
+        aged_repo.compact()
+        assert pragma("freelist_count") == 0
+        assert pragma("page_count") < before
+
+    def test_コマンドからアーカイブと読み出しができる(self, aged_repo, tmp_path, capsys):
+        archive_dir = str(tmp_path / "archive")
+        db = ["--db", aged_repo.db_path]
+        assert main([*db, "archive", "--older-than-days", "30", "--archive-dir", archive_dir]) == 0
+        assert "3件" in capsys.readouterr().out
+        assert main([*db, "read-archive", "--archive-dir", archive_dir, "--to", "2024-12"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)["url"] for line in lines] == ["https://a.com/3"]
+
+
+class TestSchemaMigration:
+    def _index_names(self, db_path):
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        conn.close()
+        return {row[0] for row in rows}
+
+    def test_新規DBは最新スキーマで作成される(self, repo):
+        assert repo.schema_version() == SCHEMA_VERSION
+        names = self._index_names(repo.db_path)
+        assert "idx_articles_created_at" in names
+        assert "idx_articles_unsummarized" in names
+
+    def test_既存DBはデータを保ったままアップグレードされる(self, tmp_path):
+        db_path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(CREATE_TABLE_SQL)
+        conn.execute(
+            "INSERT INTO articles (title, url, source) VALUES ('Old', 'https://old.com', 'Src')"
+        )
+        conn.commit()
+        conn.close()
+
+        with ArticleRepository(db_path) as repository:
+            assert repository.schema_version() == SCHEMA_VERSION
+            assert repository.get_unsummarized()[0]["url"] == "https://old.com"
+            assert [r["url"] for r in repository.search("old")] == ["https://old.com"]
+        assert "idx_articles_unsummarized" in self._index_names(db_path)
+
+    def test_短い語の索引は既存の記事から作成される(self, tmp_path):
+        db_path = str(tmp_path / "test.db")
+        with ArticleRepository(db_path) as repository:
+            repository.save(Article("Go 1.22 released", "https://go.dev/1", "", "Blog", ""))
+            with repository._conn:
+                repository._conn.execute("DROP TABLE article_search_terms")
+                repository._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+
+        with ArticleRepository(db_path) as repository:
+            assert [r["url"] for r in repository.search("go")] == ["https://go.dev/1"]
+
+    def test_マイグレーションは何度実行しても冪等(self, tmp_path):
+        db_path = str(tmp_path / "test.db")
+        for _ in range(3):
+            with ArticleRepository(db_path) as repository:
+                repository.save(Article("A1", "https://a.com/1", "S1", "Src1", "2026-01-01"))
+                assert repository.schema_version() == SCHEMA_VERSION
+        with ArticleRepository(db_path) as repository:
+            assert len(repository.get_all()) == 1
+
+    @pytest.mark.parametrize(
+        ("sql", "index_name"),
+        [
+            (
+                "SELECT * FROM articles WHERE is_summarized = 0 ORDER BY created_at DESC, id DESC",
+                "idx_articles_unsummarized",
+            ),
+            ("SELECT * FROM articles ORDER BY created_at DESC, id DESC", "idx_articles_created_at"),
+        ],
+    )
+    def test_一覧取得クエリはインデックスを使いソートしない(self, repo, sql, index_name):
+        plan = " ".join(row[3] for row in repo._conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        assert index_name in plan
+        assert "TEMP B-TREE" not in plan
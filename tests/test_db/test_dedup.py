@@ -0,0 +1,83 @@
+import pytest
+
+from src.db.dedup import (
+    canonicalize_url,
+    estimate_similarity,
+    fingerprint,
+    lsh_bands,
+    minhash_signature,
+    pack_signature,
+    unpack_signature,
+    url_hash,
+)
+
+BODY = (
+    "Databricks announced a new serverless vector search service that integrates with "
+    "Unity Catalog and lets data engineers build retrieval augmented generation pipelines "
+    "without managing infrastructure, with pricing based on usage and support for "
+    "automatic index synchronization from Delta tables."
+)
+
+
+class TestCanonicalizeUrl:
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://example.com/post",
+            "http://example.com/post",
+            "https://www.example.com/post/",
+            "https://EXAMPLE.com/post?utm_source=rss&utm_medium=feed",
+            "https://example.com:443/post#comments",
+            "https://example.com//post?fbclid=abc",
+        ],
+    )
+    def test_表記ゆれのURLは同じ正規形になる(self, url):
+        assert canonicalize_url(url) == "//example.com/post"
+
+    def test_意味のあるクエリは残して並べ替える(self):
+        assert canonicalize_url("https://a.com/p?b=2&utm_campaign=x&a=1") == "//a.com/p?a=1&b=2"
+
+    def test_パスが異なれば別のURL(self):
+        assert canonicalize_url("https://a.com/1") != canonicalize_url("https://a.com/2")
+
+    def test_ホストのないURLはそのまま返す(self):
+        assert canonicalize_url("") == ""
+
+    def test_URLハッシュは符号付き64ビット整数(self):
+        value = url_hash(canonicalize_url("https://a.com/1"))
+        assert -(1 << 63) <= value < 1 << 63
+        assert value == url_hash("//a.com/1")
+        assert value != url_hash("//a.com/2")
+
+
+class TestMinHash:
+    def test_短すぎる本文は署名を作らない(self):
+        assert minhash_signature("A1 S1") is None
+
+    def test_ほぼ同じ本文は類似度が高くバケットを共有する(self):
+        edited = BODY.replace("new serverless", "brand new serverless") + " Read more."
+        a, b = minhash_signature(BODY), minhash_signature(edited)
+        assert estimate_similarity(a, b) >= 0.7
+        assert set(lsh_bands(a)) & set(lsh_bands(b))
+
+    def test_無関係な本文はバケットを共有しない(self):
+        other = (
+            "Snowflake released a preview of its open source table format connector that "
+            "lets Apache Iceberg users query external catalogs, adds row level security "
+            "policies, and improves query pruning for large partitioned datasets in the cloud."
+        )
+        a, b = minhash_signature(BODY), minhash_signature(other)
+        assert estimate_similarity(a, b) < 0.3
+        assert not set(lsh_bands(a)) & set(lsh_bands(b))
+
+    def test_HTMLタグは無視される(self):
+        assert minhash_signature(f"<p>{BODY}</p>") == minhash_signature(BODY)
+
+    def test_署名はバイト列と相互変換できる(self):
+        signature = minhash_signature(BODY)
+        assert unpack_signature(pack_signature(signature)) == signature
+
+    def test_フィンガープリントはURLを正規化する(self):
+        fp = fingerprint("https://www.example.com/a/?utm_source=x", "Title", BODY)
+        assert fp.canonical_url == "//example.com/a"
+        assert len(fp.bands()) == 8
@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("feedparser", "anthropic", "playwright")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = sorted({{name.split(".")[0] for name in sys.modules}})
+print(json.dumps({{"seconds": elapsed, "modules": loaded}}))
+"""
+
+
+def _import_in_subprocess(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _best_of(module: str, repeat: int = 3) -> dict:
+    return min((_import_in_subprocess(module) for _ in range(repeat)), key=lambda r: r["seconds"])
+
+
+class TestImportTime:
+    @pytest.mark.parametrize(
+        ("module", "budget"),
+        [
+            ("src.models", 0.05),
+            ("src.db.article_repository", 0.15),
+            ("src.collector.rss_collector", 0.15),
+            ("src.collector.hn_collector", 0.15),
+            ("src.summarizer.article_summarizer", 0.15),
+            ("src.publisher.note_publisher", 0.15),
+            ("src.pipeline", 0.25),
+        ],
+    )
+    def test_重いSDKを読み込まず予算内でimportできる(self, module, budget):
+        result = _best_of(module)
+        assert not set(HEAVY_MODULES) & set(result["modules"])
+        assert result["seconds"] < budget
+
+    @pytest.mark.parametrize(
+        "module",
+        [
+            "src.models",
+            "src.db.article_repository",
+            "src.summarizer.article_summarizer",
+            "src.publisher.note_publisher",
+        ],
+    )
+    def test_HTTPを使わないモジュールはHTTPクライアントも読み込まない(self, module):
+        result = _import_in_subprocess(module)
+        assert "httpx" not in result["modules"]
+
+    def test_Articleは従来のモジュールからもimportできる(self):
+        from src.collector.rss_collector import Article as LegacyArticle
+        from src.models import Article
+
+        assert LegacyArticle is Article
@@ -0,0 +1,174 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.collector.hn_collector import HnCollector
+from src.collector.rss_collector import Article, RssCollector
+from src.db.article_repository import ArticleRepository
+from src.metrics import Metrics, metrics
+from src.summarizer.article_summarizer import ArticleSummarizer
+from src.summarizer.summary_cache import SummaryCache
+
+RSS_XML = (
+    '<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>'
+    "<item><title>A</title><link>https://a.com/1</link><description>d</description></item>"
+    "</channel></rss>"
+)
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics:
+    def test_無効時は何も記録しない(self):
+        registry = Metrics()
+        registry.increment("requests_total")
+        registry.observe("request_seconds", 1.0)
+        with registry.timer("request_seconds"):
+            pass
+        assert registry.counter("requests_total") == 0
+        assert registry.timing("request_seconds") is None
+        assert registry.to_prometheus() == ""
+
+    def test_ラベルごとにカウンタを集計する(self):
+        registry = Metrics(enabled=True)
+        registry.increment("requests_total", endpoint="item")
+        registry.increment("requests_total", 2, endpoint="item")
+        registry.increment("requests_total", endpoint="topstories")
+        assert registry.counter("requests_total", endpoint="item") == 3
+        assert registry.counter("requests_total", endpoint="topstories") == 1
+
+    def test_タイマーは回数と合計と最大を記録する(self):
+        clock = FakeClock()
+        registry = Metrics(enabled=True, clock=clock)
+        for elapsed in (0.5, 1.5):
+            with registry.timer("request_seconds", model="m"):
+                clock.now += elapsed
+        assert registry.timing("request_seconds", model="m") == {
+            "count": 2,
+            "sum": 2.0,
+            "max": 1.5,
+        }
+
+    def test_Prometheusテキスト形式で出力できる(self, tmp_path):
+        registry = Metrics(enabled=True)
+        registry.increment("rss_fetch_bytes_total", 120, feed='A "quoted"')
+        registry.observe("rss_fetch_seconds", 0.25, feed="A")
+        path = tmp_path / "metrics.prom"
+        registry.write_prometheus(str(path))
+
+        text = path.read_text()
+        assert "# TYPE rss_fetch_bytes_total counter" in text
+        assert 'rss_fetch_bytes_total{feed="A \\"quoted\\""} 120' in text
+        assert "# TYPE rss_fetch_seconds summary" in text
+        assert 'rss_fetch_seconds_count{feed="A"} 1' in text
+        assert 'rss_fetch_seconds_sum{feed="A"} 0.25' in text
+
+    def test_JSON行形式で追記できる(self, tmp_path):
+        registry = Metrics(enabled=True)
+        registry.increment("llm_requests_total", model="m")
+        path = tmp_path / "metrics.jsonl"
+        registry.write_json_lines(str(path))
+        registry.write_json_lines(str(path))
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert len(records) == 2
+        assert records[0]["name"] == "llm_requests_total"
+        assert records[0]["labels"] == {"model": "m"}
+        assert records[0]["value"] == 1
+
+
+class TestInstrumentation:
+    def test_フィードごとの取得時間とバイト数を記録する(self, enabled_metrics):
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, content=RSS_XML.encode(), headers={"Content-Type": "application/rss+xml"}
+            )
+        )
+        collector = RssCollector(transport=transport)
+        collector.fetch_feed("https://a.com/feed", "A")
+
+        assert enabled_metrics.timing("rss_fetch_seconds", feed="A")["count"] == 1
+        assert enabled_metrics.counter("rss_fetch_bytes_total", feed="A") == len(RSS_XML)
+        assert enabled_metrics.counter("rss_articles_total", feed="A") == 1
+
+    def test_HNのリクエスト数とリトライ数を記録する(self, enabled_metrics):
+        failures = {"count": 1}
+
+        def handler(request):
+            if request.url.path.endswith("topstories.json"):
+                return httpx.Response(200, json=[1])
+            if failures["count"]:
+                failures["count"] -= 1
+                return httpx.Response(503)
+            return httpx.Response(200, json={"type": "story", "title": "AI news", "url": "u"})
+
+        collector = HnCollector(
+            keywords=["AI"], transport=httpx.MockTransport(handler), retry_backoff=0
+        )
+        asyncio.run(collector.fetch_relevant_stories_async())
+
+        assert enabled_metrics.counter("hn_requests_total", endpoint="topstories") == 1
+        assert enabled_metrics.counter("hn_requests_total", endpoint="item") == 2
+        assert enabled_metrics.counter("hn_retries_total", endpoint="item") == 1
+
+    def test_DBの挿入数と重複数を記録する(self, enabled_metrics, tmp_path):
+        with ArticleRepository(str(tmp_path / "test.db")) as repo:
+            article = Article("t", "https://a.com/1", "s", "src", "")
+            repo.save_many([article, Article("u", "https://a.com/2", "s2", "src", "")])
+            repo.save_many([article])
+
+        assert enabled_metrics.counter("db_articles_inserted_total") == 2
+        assert enabled_metrics.counter("db_articles_duplicate_total") == 1
+        assert enabled_metrics.timing("db_insert_seconds")["count"] == 2
+
+    def test_URL重複と近似重複を分けて数える(self, enabled_metrics, tmp_path):
+        body = " ".join(f"word{i}" for i in range(60))
+        with ArticleRepository(str(tmp_path / "test.db")) as repo:
+            repo.save_many([Article("Original", "https://a.com/1", body, "src", "")])
+            repo.save_many(
+                [
+                    Article("Original", "https://www.a.com/1/?utm_source=x", body, "src", ""),
+                    Article("Original", "https://b.com/copy", body, "src", ""),
+                ]
+            )
+
+        assert enabled_metrics.counter("db_articles_url_duplicate_total") == 1
+        assert enabled_metrics.counter("db_articles_near_duplicate_total") == 1
+        assert enabled_metrics.counter("db_articles_duplicate_total") == 2
+
+    def test_LLMのレイテンシとトークンとキャッシュヒットを記録する(self, enabled_metrics, tmp_path):
+        response = SimpleNamespace(
+            content=[SimpleNamespace(text="要約")],
+            usage=SimpleNamespace(input_tokens=100, output_tokens=20),
+        )
+        client = SimpleNamespace(messages=SimpleNamespace(create=lambda **kwargs: response))
+        cache = SummaryCache(str(tmp_path / "cache.db"))
+        summarizer = ArticleSummarizer(api_key="test", client=client, cache=cache)
+        summarizer.summarize("タイトル", "本文")
+        summarizer.summarize("タイトル", "本文")
+        cache.close()
+
+        model = summarizer.model
+        assert enabled_metrics.timing("llm_request_seconds", model=model)["count"] == 1
+        assert enabled_metrics.counter("llm_tokens_total", type="input_tokens") == 100
+        assert enabled_metrics.counter("llm_tokens_total", type="output_tokens") == 20
+        assert enabled_metrics.counter("summary_cache_hits_total") == 1
+        assert enabled_metrics.counter("summary_cache_misses_total") == 1
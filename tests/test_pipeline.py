@@ -0,0 +1,311 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.collector.hn_collector import HnCollector
+from src.collector.rss_collector import RssCollector
+from src.db.article_repository import ArticleRepository
+from src.pipeline import Pipeline, PipelineConfig
+from src.summarizer.article_summarizer import ArticleSummarizer
+
+
+def _rss_xml(*items):
+    body = "".join(
+        f"<item><title>{title}</title><link>{link}</link>"
+        f"<description>{title} summary</description></item>"
+        for title, link in items
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{body}</channel></rss>'
+    )
+
+
+def _feed_transport(feeds):
+    def handler(request):
+        body = feeds.get(str(request.url))
+        if body is None:
+            return httpx.Response(500)
+        return httpx.Response(
+            200, content=body.encode(), headers={"Content-Type": "application/rss+xml"}
+        )
+
+    return httpx.MockTransport(handler)
+
+
+class FakeMessages:
+    def __init__(self, delay=0.0, fail_on=()):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        content = kwargs["messages"][0]["content"]
+        with self._lock:
+            self.calls.append(content)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if any(word in content for word in self.fail_on):
+                raise RuntimeError("boom")
+            return SimpleNamespace(content=[SimpleNamespace(text=f"要約: {content[:20]}")])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with ArticleRepository(str(tmp_path / "test.db")) as repository:
+        yield repository
+
+
+def _make_pipeline(repo, feeds, bodies, messages=None, publisher=None, **config):
+    collector = RssCollector(transport=_feed_transport(bodies), retry_backoff=0)
+    summarizer = None
+    if messages is not None:
+        summarizer = ArticleSummarizer(
+            api_key="test", client=SimpleNamespace(messages=messages), max_retries=0
+        )
+    return Pipeline(
+        repo,
+        summarizer=summarizer,
+        rss_collector=collector,
+        feeds=feeds,
+        publisher=publisher,
+        config=PipelineConfig(save_flush_interval=0.05, **config),
+    )
+
+
+FEEDS = [
+    {"name": "A", "url": "https://a.example.com/feed"},
+    {"name": "B", "url": "https://b.example.com/feed"},
+]
+
+BODIES = {
+    "https://a.example.com/feed": _rss_xml(
+        ("Vector search at scale", "https://a.example.com/1"),
+        ("Streaming joins explained", "https://a.example.com/2"),
+    ),
+    "https://b.example.com/feed": _rss_xml(("Lakehouse governance", "https://b.example.com/1")),
+}
+
+
+class TestPipelineConfig:
+    def test_未知のキーは無視して既定値を補う(self):
+        config = PipelineConfig.from_dict({"summarize_workers": 8, "unknown": 1})
+        assert config.summarize_workers == 8
+        assert config.queue_size == PipelineConfig().queue_size
+
+    def test_設定が無ければ既定値(self):
+        assert PipelineConfig.from_dict(None) == PipelineConfig()
+
+
+class TestPipeline:
+    def test_収集から公開までストリーミングで処理する(self, repo):
+        published = []
+        pipeline = _make_pipeline(
+            repo,
+            FEEDS,
+            BODIES,
+            messages=FakeMessages(),
+            publisher=lambda article, summary: published.append((article.url, summary)),
+        )
+        stats = pipeline.run()
+
+        assert stats.collected == 3
+        assert stats.saved == 3
+        assert stats.summarized == 3
+        assert stats.published == 3
+        assert repo.get_unsummarized() == []
+        assert all(row["summary"].startswith("要約: ") for row in repo.get_all())
+        assert sorted(url for url, _ in published) == sorted(row["url"] for row in repo.get_all())
+
+    def test_保存済みの記事は再要約しない(self, repo):
+        messages = FakeMessages()
+        _make_pipeline(repo, FEEDS, BODIES, messages=messages).run()
+        stats = _make_pipeline(repo, FEEDS, BODIES, messages=messages).run()
+
+        assert stats.collected == 3
+        assert stats.saved == 0
+        assert stats.summarized == 0
+        assert len(messages.calls) == 3
+
+    def test_取得失敗したフィードがあっても他は処理を続ける(self, repo):
+        feeds = [*FEEDS, {"name": "Broken", "url": "https://broken.example.com/feed"}]
+        stats = _make_pipeline(repo, feeds, BODIES, messages=FakeMessages()).run()
+
+        assert stats.source_failed == 1
+        assert stats.summarized == 3
+
+    def test_不正な実体参照を含むフィードでも取得できた記事は保存する(self, repo):
+        body = _rss_xml(
+            ("Vector search &bogus; at scale", "https://a.example.com/1"),
+            ("Streaming joins explained", "https://a.example.com/2"),
+        )
+        stats = _make_pipeline(repo, FEEDS[:1], {FEEDS[0]["url"]: body}).run()
+
+        assert stats.source_failed == 0
+        assert stats.saved == 2
+        assert sorted(row["url"] for row in repo.get_all()) == [
+            "https://a.example.com/1",
+            "https://a.example.com/2",
+        ]
+
+    def test_要約失敗は記録して未要約のまま残す(self, repo):
+        published = []
+        stats = _make_pipeline(
+            repo,
+            FEEDS,
+            BODIES,
+            messages=FakeMessages(fail_on=("Lakehouse",)),
+            publisher=lambda article, summary: published.append(article.url),
+        ).run()
+
+        assert stats.summarized == 2
+        assert stats.summarize_failed == 1
+        assert [row["url"] for row in repo.get_unsummarized()] == ["https://b.example.com/1"]
+        assert "https://b.example.com/1" not in published
+
+    def test_前回要約に失敗した記事を次の実行で再要約する(self, repo):
+        _make_pipeline(repo, FEEDS, BODIES, messages=FakeMessages(fail_on=("Lakehouse",))).run()
+        messages = FakeMessages()
+        stats = _make_pipeline(repo, FEEDS, BODIES, messages=messages).run()
+
+        assert stats.saved == 0
+        assert stats.summarized == 1
+        assert len(messages.calls) == 1
+        assert repo.get_unsummarized() == []
+
+    def test_再要約を無効にすると新着だけを要約する(self, repo):
+        _make_pipeline(repo, FEEDS, BODIES).run()
+        stats = _make_pipeline(
+            repo, FEEDS, BODIES, messages=FakeMessages(), retry_unsummarized=False
+        ).run()
+
+        assert stats.summarized == 0
+        assert len(repo.get_unsummarized()) == 3
+
+    def test_公開失敗は他の記事に影響しない(self, repo):
+        def publisher(article, summary):
+            if "b.example.com" in article.url:
+                raise RuntimeError("publish failed")
+
+        stats = _make_pipeline(
+            repo, FEEDS, BODIES, messages=FakeMessages(), publisher=publisher
+        ).run()
+
+        assert stats.published == 2
+        assert stats.publish_failed == 1
+        assert [row["url"] for row in repo.get_unpublished()] == ["https://b.example.com/1"]
+
+    def test_公開した記事は次の実行で再投稿しない(self, repo):
+        published = []
+        for _ in range(2):
+            _make_pipeline(
+                repo,
+                FEEDS,
+                BODIES,
+                messages=FakeMessages(fail_on=("Lakehouse",)),
+                publisher=lambda article, summary: published.append(article.url),
+            ).run()
+        _make_pipeline(
+            repo,
+            FEEDS,
+            BODIES,
+            messages=FakeMessages(),
+            publisher=lambda article, summary: published.append(article.url),
+        ).run()
+
+        assert sorted(published) == [
+            "https://a.example.com/1",
+            "https://a.example.com/2",
+            "https://b.example.com/1",
+        ]
+        assert repo.get_unpublished() == []
+
+    def test_保存に一時的に失敗したバッチは捨てずに再試行する(self, repo, monkeypatch):
+        save_new = repo.save_new
+        failures = iter([True])
+
+        def flaky(articles):
+            if next(failures, False):
+                raise RuntimeError("database is locked")
+            return save_new(articles)
+
+        monkeypatch.setattr(repo, "save_new", flaky)
+        stats = _make_pipeline(repo, FEEDS, BODIES, save_batch_size=1).run()
+
+        assert stats.saved == 3
+        assert stats.save_failed == 0
+        assert len(repo.get_all()) == 3
+
+    def test_保存できなかった記事は失敗として数える(self, repo, monkeypatch):
+        def broken(articles):
+            raise RuntimeError("disk I/O error")
+
+        monkeypatch.setattr(repo, "save_new", broken)
+        stats = _make_pipeline(repo, FEEDS, BODIES).run()
+
+        assert stats.saved == 0
+        assert stats.save_failed == 3
+
+    def test_保存に失敗したフィードは取得位置を進めない(self, repo, monkeypatch):
+        def broken(articles):
+            raise RuntimeError("disk I/O error")
+
+        save_new = repo.save_new
+        monkeypatch.setattr(repo, "save_new", broken)
+        collector = RssCollector(transport=_feed_transport(BODIES), watermarks=repo)
+        Pipeline(repo, rss_collector=collector, feeds=FEEDS).run()
+
+        assert repo.get_watermark(FEEDS[0]["url"]) is None
+        assert collector.feed_cache == {}
+
+        monkeypatch.setattr(repo, "save_new", save_new)
+        stats = Pipeline(repo, rss_collector=collector, feeds=FEEDS).run()
+
+        assert stats.saved == 3
+        assert repo.get_watermark(FEEDS[0]["url"]) is not None
+
+    def test_HNを収集したら古い既読IDを削除する(self, repo, monkeypatch):
+        pruned = []
+        monkeypatch.setattr(repo, "prune_seen_items", lambda days: pruned.append(days) or 0)
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+        hn_collector = HnCollector(keywords=["AI"], transport=transport, seen_store=repo)
+        Pipeline(
+            repo, hn_collector=hn_collector, config=PipelineConfig(seen_retention_days=7)
+        ).run()
+
+        assert pruned == [7]
+
+    def test_要約器が無ければ保存だけ行う(self, repo):
+        stats = _make_pipeline(repo, FEEDS, BODIES).run()
+
+        assert stats.saved == 3
+        assert stats.summarized == 0
+        assert len(repo.get_unsummarized()) == 3
+
+    def test_小さなキューでも要約ワーカーが並行して動く(self, repo):
+        items = [(f"Article {i}", f"https://a.example.com/{i}") for i in range(12)]
+        bodies = {"https://a.example.com/feed": _rss_xml(*items)}
+        messages = FakeMessages(delay=0.02)
+        stats = _make_pipeline(
+            repo,
+            FEEDS[:1],
+            bodies,
+            messages=messages,
+            queue_size=1,
+            save_batch_size=1,
+            summarize_workers=4,
+        ).run()
+
+        assert stats.summarized == 12
+        assert messages.max_active > 1
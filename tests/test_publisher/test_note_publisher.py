@@ -0,0 +1,232 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from src.collector.rss_collector import Article
+from src.db.article_repository import ArticleRepository
+from src.publisher.note_publisher import NotePublisher, build_digest, publish_pending
+
+FORM_HTML = b"""<!doctype html><html><body>
+<form method="post" action="/posts">
+<textarea id="title" name="title"></textarea>
+<textarea id="body" name="body"></textarea>
+<button id="publish" type="submit">publish</button>
+</form></body></html>"""
+
+SELECTORS = {
+    "title": "#title",
+    "body": "#body",
+    "publish": "#publish",
+    "confirm": None,
+    "done": "#posted",
+}
+
+
+class FakePublisher:
+    def __init__(self, fail_after=None):
+        self.digests = []
+        self.fail_after = fail_after
+
+    def publish_digest(self, digest, on_submitted=None):
+        if self.fail_after is not None and len(self.digests) >= self.fail_after:
+            raise RuntimeError("post failed")
+        self.digests.append(digest)
+        if on_submitted is not None:
+            on_submitted()
+        return "https://note.example.com/n/1"
+
+
+class FakePage:
+    def __init__(self, click_error=None):
+        self.click_error = click_error
+        self.clicks = []
+        self.closed = False
+
+    def goto(self, url):
+        pass
+
+    def fill(self, selector, value):
+        pass
+
+    def click(self, selector):
+        if self.click_error is not None:
+            raise self.click_error
+        self.clicks.append(selector)
+
+    def wait_for_selector(self, selector):
+        raise TimeoutError("Timeout 30000ms exceeded")
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with ArticleRepository(str(tmp_path / "test.db")) as repository:
+        yield repository
+
+
+def _save_summarized(repo, count):
+    articles = [
+        Article(
+            title=f"Article {i}",
+            url=f"https://example.com/{i}",
+            summary=f"body {i}",
+            source="Test",
+            published="",
+        )
+        for i in range(count)
+    ]
+    repo.save_many(articles)
+    repo.save_summaries([{"url": a.url, "summary": f"要約 {a.title}"} for a in articles])
+
+
+@pytest.fixture
+def note_server():
+    posts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(FORM_HTML)
+
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            fields = parse_qs(self.rfile.read(length).decode())
+            posts.append({key: values[0] for key, values in fields.items()})
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(b'<html><body><div id="posted">ok</div></body></html>')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/new", posts
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def browser_publisher(note_server, tmp_path):
+    url, _ = note_server
+    publisher = NotePublisher(
+        storage_state_path=str(tmp_path / "state.json"), post_url=url, selectors=SELECTORS
+    )
+    try:
+        publisher.start()
+    except Exception as e:
+        pytest.skip(f"ブラウザを起動できません: {str(e).splitlines()[0]}")
+    yield publisher
+    publisher.close()
+
+
+class TestBuildDigest:
+    def test_複数の要約を一つの投稿本文にまとめる(self):
+        digest = build_digest(
+            [
+                Article("A", "https://a.example.com", "要約A", "S", ""),
+                Article("B", "https://b.example.com", "要約B", "S", ""),
+            ],
+            title="まとめ",
+        )
+        assert digest.title == "まとめ"
+        assert digest.urls == ["https://a.example.com", "https://b.example.com"]
+        assert digest.body.index("要約A") < digest.body.index("要約B")
+        assert "出典: S https://b.example.com" in digest.body
+
+
+class TestPublishPending:
+    def test_未投稿の要約済み記事をダイジェスト単位で投稿する(self, repo):
+        _save_summarized(repo, 5)
+        publisher = FakePublisher()
+
+        assert publish_pending(repo, publisher, digest_size=2, max_digests=3) == 5
+        assert [len(d.urls) for d in publisher.digests] == [2, 2, 1]
+        assert publisher.digests[0].title.endswith("(1/3)")
+        assert repo.get_unpublished() == []
+
+    def test_一度に投稿するダイジェスト数に上限がある(self, repo):
+        _save_summarized(repo, 7)
+        publisher = FakePublisher()
+
+        assert publish_pending(repo, publisher, digest_size=2) == 2
+        assert len(publisher.digests) == 1
+        assert publish_pending(repo, publisher, digest_size=2, max_digests=2) == 4
+        assert len(repo.get_unpublished()) == 1
+
+    def test_投稿済みの記事は二度と投稿しない(self, repo):
+        _save_summarized(repo, 3)
+        publish_pending(repo, FakePublisher())
+        publisher = FakePublisher()
+
+        assert publish_pending(repo, publisher) == 0
+        assert publisher.digests == []
+
+    def test_投稿失敗したダイジェストは未投稿のまま残す(self, repo):
+        _save_summarized(repo, 4)
+
+        publisher = FakePublisher(fail_after=1)
+        assert publish_pending(repo, publisher, digest_size=2, max_digests=2) == 2
+        assert len(repo.get_unpublished()) == 2
+
+
+class TestPublishConfirmation:
+    def _publisher(self, page):
+        publisher = NotePublisher(post_url="https://note.example.com/new", selectors=SELECTORS)
+        publisher._context = object()
+        publisher._page = page
+        return publisher
+
+    def test_投稿ボタン押下後に完了確認が失敗しても再投稿しない(self, repo):
+        _save_summarized(repo, 2)
+        page = FakePage()
+        publisher = self._publisher(page)
+
+        assert publish_pending(repo, publisher) == 2
+        assert repo.get_unpublished() == []
+
+        publisher._page = page = FakePage()
+        assert publish_pending(repo, publisher) == 0
+        assert page.clicks == []
+
+    def test_投稿ボタンを押す前の失敗は未投稿のまま残す(self, repo):
+        _save_summarized(repo, 2)
+        page = FakePage(click_error=TimeoutError("no button"))
+
+        assert publish_pending(repo, self._publisher(page)) == 0
+        assert len(repo.get_unpublished()) == 2
+
+
+class TestNotePublisherBrowser:
+    def test_ローカルの投稿フォームに投稿できる(self, browser_publisher, note_server):
+        _, posts = note_server
+        browser_publisher.publish("タイトル", "本文")
+
+        assert posts == [{"title": "タイトル", "body": "本文"}]
+
+    def test_複数回の投稿でページとコンテキストを再利用する(self, browser_publisher, note_server):
+        _, posts = note_server
+        browser_publisher.publish("1", "a")
+        context = browser_publisher._context
+        page = browser_publisher._page
+        browser_publisher.publish("2", "b")
+
+        assert len(posts) == 2
+        assert browser_publisher._context is context
+        assert browser_publisher._page is page
+
+    def test_終了時に認証状態を保存する(self, browser_publisher, tmp_path):
+        browser_publisher.close()
+
+        assert (tmp_path / "state.json").exists()
@@ -0,0 +1,238 @@
+import random
+import threading
+import time
+
+import pytest
+
+from src.collector.rss_collector import Article
+from src.db.article_repository import ArticleRepository
+from src.scheduler import AdaptiveScheduler, ScheduleBounds, Source, build_sources
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeFeed:
+    def __init__(self, key, clock, period):
+        self.key = key
+        self.clock = clock
+        self.period = period
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.period is None:
+            return [], None
+        published = int(self.clock() // self.period)
+        return [
+            Article(f"{self.key} {i}", f"https://{self.key}.com/{i}", "", self.key, "")
+            for i in range(max(published - 5, 0), published + 1)
+        ], None
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with ArticleRepository(str(tmp_path / "test.db")) as repository:
+        yield repository
+
+
+BOUNDS = ScheduleBounds(min_interval=60, max_interval=86400, initial_interval=3600)
+
+
+def _source(feed, bounds=BOUNDS):
+    return Source(key=feed.key, name=feed.key, fetch=feed, bounds=bounds)
+
+
+def _scheduler(repo, feeds, clock, **kwargs):
+    return AdaptiveScheduler(
+        [_source(feed) for feed in feeds],
+        repo,
+        clock=clock,
+        rng=random.Random(0),
+        **kwargs,
+    )
+
+
+def _simulate(scheduler, clock, duration, step=30):
+    end = clock.now + duration
+    while clock.now < end:
+        scheduler.run_once()
+        clock.now += step
+
+
+class TestScheduleBounds:
+    def test_ソース別の設定で既定値を上書きする(self):
+        defaults = ScheduleBounds.from_dict({"min_interval": 900, "jitter": 0.1})
+        bounds = ScheduleBounds.from_dict({"min_interval": 60}, defaults)
+        assert defaults.min_interval == 900
+        assert bounds.min_interval == 60
+        assert bounds.max_interval == defaults.max_interval
+
+    def test_範囲内に丸める(self):
+        assert BOUNDS.clamp(1) == 60
+        assert BOUNDS.clamp(10**9) == 86400
+
+
+class TestAdaptiveScheduler:
+    def test_更新頻度の高いソースは間隔が短くなり静かなソースは長くなる(self, repo):
+        clock = FakeClock()
+        busy = FakeFeed("busy", clock, period=120)
+        quiet = FakeFeed("quiet", clock, period=None)
+        scheduler = _scheduler(repo, [busy, quiet], clock, jitter=0)
+        _simulate(scheduler, clock, duration=6 * 3600)
+
+        assert scheduler.states["busy"].interval < 600
+        assert scheduler.states["quiet"].interval > 3600 * 2
+        assert busy.calls > quiet.calls * 5
+
+    def test_間隔は設定範囲に収まる(self, repo):
+        clock = FakeClock()
+        feed = FakeFeed("firehose", clock, period=1)
+        scheduler = _scheduler(repo, [feed], clock, jitter=0)
+        _simulate(scheduler, clock, duration=3 * 3600)
+
+        assert scheduler.states["firehose"].interval == BOUNDS.min_interval
+
+    def test_固定間隔より総リクエスト数が大きく減る(self, repo):
+        clock = FakeClock()
+        feeds = [FakeFeed("hn", clock, period=300)] + [
+            FakeFeed(f"blog{i}", clock, period=2 * 86400) for i in range(8)
+        ]
+        scheduler = _scheduler(repo, feeds, clock)
+        week = 7 * 86400
+        _simulate(scheduler, clock, duration=week, step=60)
+
+        fixed_requests = len(feeds) * week / BOUNDS.min_interval
+        assert sum(feed.calls for feed in feeds) < fixed_requests * 0.2
+        assert scheduler.states["hn"].interval <= 900
+
+    def test_期限の来たソースだけを取得する(self, repo):
+        clock = FakeClock()
+        a = FakeFeed("a", clock, period=None)
+        b = FakeFeed("b", clock, period=None)
+        scheduler = _scheduler(repo, [a, b], clock, jitter=0)
+        scheduler.run_once()
+        scheduler.states["b"].next_poll_at = clock.now
+
+        assert scheduler.run_once() == {"b": 0}
+        assert (a.calls, b.calls) == (1, 2)
+
+    def test_ジッターで次回取得時刻をばらす(self, repo):
+        clock = FakeClock()
+        feeds = [FakeFeed(f"f{i}", clock, period=None) for i in range(10)]
+        scheduler = _scheduler(repo, feeds, clock, jitter=0.2)
+        scheduler.run_once()
+
+        offsets = {state.next_poll_at - clock.now for state in scheduler.states.values()}
+        assert len(offsets) == 10
+        assert all(3600 * 0.8 <= offset <= 3600 * 1.2 for offset in offsets)
+
+    def test_期限の来たソースを並行して取得する(self, repo):
+        active = {"now": 0, "max": 0}
+        lock = threading.Lock()
+
+        def slow_fetch():
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.05)
+            with lock:
+                active["now"] -= 1
+            return [], None
+
+        sources = [Source(f"s{i}", f"s{i}", slow_fetch, BOUNDS) for i in range(4)]
+        AdaptiveScheduler(sources, repo, max_concurrency=4).run_once()
+
+        assert active["max"] > 1
+
+    def test_取得失敗したソースも次回に再スケジュールする(self, repo):
+        clock = FakeClock()
+
+        def broken():
+            raise RuntimeError("boom")
+
+        ok = FakeFeed("ok", clock, period=60)
+        sources = [Source("broken", "broken", broken, BOUNDS), _source(ok)]
+        scheduler = AdaptiveScheduler(sources, repo, clock=clock, jitter=0)
+
+        assert scheduler.run_once() == {"broken": 0, "ok": 6}
+        assert scheduler.states["broken"].failures == 1
+        assert scheduler.states["broken"].next_poll_at == clock.now + 3600
+
+    def test_保存に失敗したら取得位置を確定せず最短間隔で再取得する(self, repo, monkeypatch):
+        clock = FakeClock()
+        committed = []
+
+        def fetch():
+            return [Article("t", "https://a.com/1", "", "a", "")], lambda: committed.append(1)
+
+        def broken(articles):
+            raise RuntimeError("disk I/O error")
+
+        monkeypatch.setattr(repo, "save_new", broken)
+        scheduler = AdaptiveScheduler(
+            [Source("a", "a", fetch, BOUNDS)], repo, clock=clock, jitter=0
+        )
+
+        assert scheduler.run_once() == {"a": 0}
+        assert committed == []
+        assert scheduler.states["a"].failures == 1
+        assert scheduler.states["a"].next_poll_at == clock.now + BOUNDS.min_interval
+
+    def test_既読IDは一日一回だけ削除する(self, repo, monkeypatch):
+        clock = FakeClock()
+        pruned = []
+        monkeypatch.setattr(repo, "prune_seen_items", lambda days: pruned.append(days) or 0)
+        scheduler = _scheduler(repo, [], clock, seen_retention_days=30)
+
+        scheduler.run_once()
+        clock.now += 3600
+        scheduler.run_once()
+        clock.now += 86400
+        scheduler.run_once()
+
+        assert pruned == [30, 30]
+
+    def test_再起動後も保存した状態から再開する(self, repo):
+        clock = FakeClock()
+        feed = FakeFeed("a", clock, period=None)
+        _scheduler(repo, [feed], clock).run_once()
+        clock.now += 60
+
+        restarted = _scheduler(repo, [feed], clock)
+        assert restarted.run_once() == {}
+        assert feed.calls == 1
+        assert restarted.states["a"].polls == 1
+
+    def test_新着記事を保存して後段に渡す(self, repo):
+        clock = FakeClock()
+        received = []
+        feed = FakeFeed("a", clock, period=60)
+        _scheduler(repo, [feed], clock, sink=received.extend).run_once()
+
+        assert len(received) == 6
+        assert len(repo.get_all()) == 6
+
+
+class TestBuildSources:
+    def test_設定からソースと取得間隔の範囲を組み立てる(self):
+        config = {
+            "rss_feeds": [{"name": "Blog", "url": "https://blog.example.com/feed"}],
+            "scheduler": {
+                "min_interval": 900,
+                "sources": {"hacker_news": {"min_interval": 60}},
+            },
+        }
+        sources = build_sources(config, rss_collector=None, hn_collector=object())
+
+        assert [source.key for source in sources] == [
+            "https://blog.example.com/feed",
+            "hacker_news",
+        ]
+        assert sources[0].bounds.min_interval == 900
+        assert sources[1].bounds.min_interval == 60
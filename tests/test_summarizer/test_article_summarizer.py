@@ -1,8 +1,61 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import anthropic
+import httpx
 import pytest
 
-from src.summarizer.article_summarizer import ArticleSummarizer
+from src.collector.rss_collector import Article
+from src.summarizer.article_summarizer import ArticleSummarizer, strip_html, truncate_to_tokens
+from src.summarizer.summary_cache import SummaryCache
+
+
+def _api_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return anthropic.APIStatusError(f"status {status_code}", response=response, body=None)
+
+
+class FakeMessages:
+    def __init__(self, failures=None, delay=0.0):
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        content = kwargs["messages"][0]["content"]
+        with self._lock:
+            self.calls.append(content)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            pending = self.failures.get(content)
+            error = pending.pop(0) if pending else None
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if error:
+                raise error
+            usage = SimpleNamespace(
+                input_tokens=len(content),
+                output_tokens=10,
+                cache_creation_input_tokens=0,
+                cache_read_input_tokens=100,
+            )
+            return SimpleNamespace(content=[SimpleNamespace(text=f"要約: {content}")], usage=usage)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.messages = FakeMessages(**kwargs)
 
 
 @pytest.fixture
@@ -16,18 +69,18 @@ def mock_client():
 
 @pytest.fixture
 def summarizer(mock_client):
-    with patch("src.summarizer.article_summarizer.anthropic.Anthropic", return_value=mock_client):
+    with patch("anthropic.Anthropic", return_value=mock_client):
         return ArticleSummarizer(api_key="test-api-key")
 
 
 class TestArticleSummarizer:
     def test_初期化時にモデル名がデフォルト設定される(self):
-        with patch("src.summarizer.article_summarizer.anthropic.Anthropic"):
+        with patch("anthropic.Anthropic"):
             s = ArticleSummarizer(api_key="test-key")
             assert s.model == "claude-sonnet-4-5-20250929"
 
     def test_初期化時にモデル名を指定できる(self):
-        with patch("src.summarizer.article_summarizer.anthropic.Anthropic"):
+        with patch("anthropic.Anthropic"):
             s = ArticleSummarizer(api_key="test-key", model="claude-haiku-4-5-20251001")
             assert s.model == "claude-haiku-4-5-20251001"
 
@@ -40,7 +93,7 @@ class TestArticleSummarizer:
         mock_client.messages.create.assert_called_once()
         call_kwargs = mock_client.messages.create.call_args[1]
         assert call_kwargs["model"] == "claude-sonnet-4-5-20250929"
-        assert call_kwargs["max_tokens"] == 1024
+        assert call_kwargs["max_tokens"] == 512
 
     def test_要約プロンプトにタイトルと本文が含まれる(self, summarizer, mock_client):
         summarizer.summarize(title="テストタイトル", content="テスト本文")
@@ -66,6 +119,16 @@ class TestArticleSummarizer:
         assert results[1]["url"] == "https://a.com/2"
         assert mock_client.messages.create.call_count == 2
 
+    def test_Articleオブジェクトをそのまま要約できる(self, summarizer, mock_client):
+        results = summarizer.summarize_articles(
+            [
+                Article("記事1", "https://a.com/1", "概要1", "Src", ""),
+                {"url": "https://a.com/2", "title": "記事2"},
+            ]
+        )
+        assert [r["url"] for r in results] == ["https://a.com/1", "https://a.com/2"]
+        assert all(r["summary"] == "これはAIによる要約です。" for r in results)
+
     def test_API呼び出し失敗時はエラーを返す(self, summarizer, mock_client):
         mock_client.messages.create.side_effect = Exception("API Error")
         results = summarizer.summarize_articles(
@@ -80,4 +143,284 @@ class TestArticleSummarizer:
         summarizer.summarize(title="テスト", content="テスト内容")
         call_kwargs = mock_client.messages.create.call_args[1]
         assert "system" in call_kwargs
-        assert "日本語" in call_kwargs["system"]
+        assert "日本語" in call_kwargs["system"][0]["text"]
+
+
+class TestConcurrentSummarization:
+    def _articles(self, n):
+        return [{"url": f"https://a.com/{i}", "title": f"記事{i}", "summary": ""} for i in range(n)]
+
+    def test_並列要約でも結果の順序は入力順のまま(self):
+        client = FakeClient(delay=0.02)
+        summarizer = ArticleSummarizer(api_key="k", max_workers=4, client=client)
+
+        results = summarizer.summarize_articles(self._articles(12))
+
+        assert [r["url"] for r in results] == [f"https://a.com/{i}" for i in range(12)]
+        assert results[3]["summary"] == "要約: タイトル: 記事3"
+        assert 1 < client.messages.max_active <= 4
+
+    def test_一部の記事が失敗してもエラー辞書で返す(self):
+        client = FakeClient(failures={"タイトル: 記事1": [ValueError("boom")]})
+        summarizer = ArticleSummarizer(api_key="k", max_workers=3, client=client)
+
+        results = summarizer.summarize_articles(self._articles(3))
+
+        assert results[1] == {"url": "https://a.com/1", "summary": None, "error": "boom"}
+        assert results[0]["summary"] and results[2]["summary"]
+
+    @patch("src.summarizer.article_summarizer.time.sleep")
+    def test_429はretry_afterに従ってリトライされる(self, mock_sleep):
+        client = FakeClient(
+            failures={"タイトル: 記事0": [_api_error(429, {"retry-after": "7"}), _api_error(529)]}
+        )
+        summarizer = ArticleSummarizer(api_key="k", client=client, retry_base_delay=0.5)
+
+        results = summarizer.summarize_articles(self._articles(1))
+
+        assert results[0]["summary"] == "要約: タイトル: 記事0"
+        assert len(client.messages.calls) == 3
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays[0] == 7.0
+        assert 1.0 <= delays[1] <= 1.5
+
+    @patch("src.summarizer.article_summarizer.time.sleep")
+    def test_リトライ上限を超えるとエラーを返す(self, mock_sleep):
+        client = FakeClient(failures={"タイトル: 記事0": [_api_error(529) for _ in range(5)]})
+        summarizer = ArticleSummarizer(api_key="k", client=client, max_retries=2)
+
+        results = summarizer.summarize_articles(self._articles(1))
+
+        assert results[0]["summary"] is None
+        assert "529" in results[0]["error"]
+        assert len(client.messages.calls) == 3
+
+    @patch("src.summarizer.article_summarizer.time.sleep")
+    def test_リトライ対象外のエラーは即座に失敗する(self, mock_sleep):
+        client = FakeClient(failures={"タイトル: 記事0": [_api_error(400)]})
+        summarizer = ArticleSummarizer(api_key="k", client=client)
+
+        results = summarizer.summarize_articles(self._articles(1))
+
+        assert results[0]["summary"] is None
+        assert len(client.messages.calls) == 1
+        mock_sleep.assert_not_called()
+
+    @patch("src.summarizer.article_summarizer.time.sleep")
+    def test_リトライのたびにレート制限の枠を消費する(self, mock_sleep):
+        client = FakeClient(failures={"タイトル: 記事0": [_api_error(529), _api_error(500)]})
+        summarizer = ArticleSummarizer(api_key="k", client=client, tokens_per_minute=100_000)
+        summarizer.rate_limiter.acquire = MagicMock(return_value=0.0)
+
+        summarizer.summarize_articles(self._articles(1))
+
+        assert len(client.messages.calls) == 3
+        assert summarizer.rate_limiter.acquire.call_count == 3
+        assert all(
+            call.args[0] > summarizer.max_tokens
+            for call in summarizer.rate_limiter.acquire.call_args_list
+        )
+
+    def test_レート制限を超えないよう待機する(self):
+        summarizer = ArticleSummarizer(
+            api_key="k", client=FakeClient(), max_workers=4, requests_per_minute=600
+        )
+        summarizer.rate_limiter.requests._tokens = 0
+
+        started = time.monotonic()
+        summarizer.summarize_articles(self._articles(2))
+
+        assert time.monotonic() - started >= 0.15
+
+
+class TestSummaryCaching:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        summary_cache = SummaryCache(str(tmp_path / "articles.db"))
+        yield summary_cache
+        summary_cache.close()
+
+    def test_同一内容の記事はURLが違ってもAPIを1回だけ呼ぶ(self, cache):
+        client = FakeClient()
+        summarizer = ArticleSummarizer(api_key="k", client=client, max_workers=4, cache=cache)
+        articles = [
+            {"url": "https://rss.com/a", "title": "New LLM", "summary": "Body"},
+            {"url": "https://hn.com/a", "title": "new  llm", "summary": "body"},
+            {"url": "https://rss.com/b", "title": "Other", "summary": "Body"},
+        ]
+
+        results = summarizer.summarize_articles(articles)
+
+        assert len(client.messages.calls) == 2
+        assert [r["url"] for r in results] == [a["url"] for a in articles]
+        assert results[0]["summary"] == results[1]["summary"]
+
+    def test_再実行時はキャッシュから返しAPIを呼ばない(self, cache):
+        articles = [{"url": "https://a.com/1", "title": "記事1", "summary": "概要1"}]
+        ArticleSummarizer(api_key="k", client=FakeClient(), cache=cache).summarize_articles(
+            articles
+        )
+
+        client = FakeClient()
+        results = ArticleSummarizer(api_key="k", client=client, cache=cache).summarize_articles(
+            articles
+        )
+
+        assert client.messages.calls == []
+        assert results[0]["summary"] == "要約: タイトル: 記事1\n\n本文: 概要1"
+        assert cache.stats()["hits"] == 1
+
+    def test_失敗した要約はキャッシュされない(self, cache):
+        client = FakeClient(failures={"タイトル: 記事0": [ValueError("boom")]})
+        summarizer = ArticleSummarizer(api_key="k", client=client, cache=cache)
+        article = {"url": "https://a.com/0", "title": "記事0", "summary": ""}
+
+        assert summarizer.summarize_articles([article])[0]["error"] == "boom"
+        assert summarizer.summarize_articles([article])[0]["summary"] == "要約: タイトル: 記事0"
+        assert len(client.messages.calls) == 2
+
+
+class FakeBatches:
+    def __init__(self, polls_until_ended=1, fail_urls=()):
+        self.polls_until_ended = polls_until_ended
+        self.fail_titles = set(fail_urls)
+        self.created = []
+        self.retrieve_calls = 0
+        self._batches = {}
+
+    def create(self, requests):
+        batch_id = f"msgbatch_{len(self.created)}"
+        self.created.append(requests)
+        self._batches[batch_id] = requests
+        return SimpleNamespace(id=batch_id)
+
+    def retrieve(self, batch_id):
+        self.retrieve_calls += 1
+        status = "ended" if self.retrieve_calls >= self.polls_until_ended else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    def results(self, batch_id):
+        for request in self._batches[batch_id]:
+            content = request["params"]["messages"][0]["content"]
+            if content in self.fail_titles:
+                result = SimpleNamespace(type="errored", error="invalid_request_error")
+            else:
+                message = SimpleNamespace(content=[SimpleNamespace(text=f"要約: {content}")])
+                result = SimpleNamespace(type="succeeded", message=message)
+            yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+
+
+class TestBatchSummarization:
+    def _articles(self, n):
+        return [{"url": f"https://a.com/{i}", "title": f"記事{i}", "summary": ""} for i in range(n)]
+
+    def _summarizer(self, batches):
+        client = FakeClient()
+        client.messages.batches = batches
+        return ArticleSummarizer(api_key="k", client=client)
+
+    def test_バックログを1つのバッチで送信し結果を対応付ける(self, tmp_path):
+        batches = FakeBatches(polls_until_ended=3, fail_urls={"タイトル: 記事1"})
+        summarizer = self._summarizer(batches)
+
+        results = summarizer.summarize_articles_batch(
+            self._articles(3), state_path=str(tmp_path / "batch.json"), poll_interval=0
+        )
+
+        assert len(batches.created) == 1
+        assert len(batches.created[0]) == 3
+        assert batches.retrieve_calls == 3
+        assert results[0]["url"] == "https://a.com/0"
+        assert results[0]["summary"] == "要約: タイトル: 記事0"
+        assert results[1]["summary"] is None
+        assert "invalid_request_error" in results[1]["error"]
+        assert results[2]["url"] == "https://a.com/2"
+
+    def test_ポーリング中にクラッシュしても再実行でバッチを再送しない(self, tmp_path):
+        state_path = str(tmp_path / "batch.json")
+        batches = FakeBatches()
+        crashing = self._summarizer(batches)
+        with patch.object(crashing, "_wait_for_batch", side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                crashing.summarize_articles_batch(self._articles(2), state_path, poll_interval=0)
+
+        results = self._summarizer(batches).summarize_articles_batch(
+            self._articles(2), state_path, poll_interval=0
+        )
+
+        assert len(batches.created) == 1
+        assert [r["summary"] for r in results] == ["要約: タイトル: 記事0", "要約: タイトル: 記事1"]
+
+    def test_完了済みの記事は再実行時に送信されない(self, tmp_path):
+        state_path = str(tmp_path / "batch.json")
+        batches = FakeBatches(fail_urls={"タイトル: 記事1"})
+        self._summarizer(batches).summarize_articles_batch(
+            self._articles(2), state_path, poll_interval=0
+        )
+
+        results = self._summarizer(batches).summarize_articles_batch(
+            self._articles(3), state_path, poll_interval=0
+        )
+
+        assert len(batches.created) == 2
+        resubmitted = [r["params"]["messages"][0]["content"] for r in batches.created[1]]
+        assert resubmitted == ["タイトル: 記事1", "タイトル: 記事2"]
+        assert results[0]["summary"] == "要約: タイトル: 記事0"
+
+    def test_状態ファイルには今回の記事の結果だけを残す(self, tmp_path):
+        state_path = tmp_path / "batch.json"
+        batches = FakeBatches()
+        articles = self._articles(4)
+        self._summarizer(batches).summarize_articles_batch(
+            articles[:2], str(state_path), poll_interval=0
+        )
+        self._summarizer(batches).summarize_articles_batch(
+            articles[2:], str(state_path), poll_interval=0
+        )
+
+        state = json.loads(state_path.read_text())
+        assert len(state["results"]) == 2
+
+
+class TestTokenBudget:
+    def test_HTMLタグとスクリプトを除去する(self):
+        html = "<p>Hello&nbsp;<b>AI</b></p><script>alert(1)</script><style>p{}</style> world"
+        assert strip_html(html) == "Hello AI world"
+        assert strip_html(None) == ""
+        assert strip_html("plain  text") == "plain text"
+
+    def test_トークン予算を超える本文は切り詰める(self):
+        assert truncate_to_tokens("abcdef", 10) == "abcdef"
+        assert truncate_to_tokens("a" * 100, 10) == "a" * 20 + "…"
+
+    def test_システムプロンプトにキャッシュ制御が付く(self, summarizer, mock_client):
+        summarizer.summarize(title="テスト", content="テスト内容")
+        system = mock_client.messages.create.call_args[1]["system"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_本文はHTML除去と切り詰めの後に送信される(self, mock_client):
+        with patch("anthropic.Anthropic", return_value=mock_client):
+            summarizer = ArticleSummarizer(api_key="k", max_input_tokens=5, max_tokens=300)
+        summarizer.summarize(title="T", content="<p>0123456789ABCDEF</p>")
+
+        call_kwargs = mock_client.messages.create.call_args[1]
+        assert call_kwargs["messages"][0]["content"] == "タイトル: T\n\n本文: 0123456789…"
+        assert call_kwargs["max_tokens"] == 300
+
+    def test_記事ごとのトークン使用量と合計を報告する(self, tmp_path):
+        cache = SummaryCache(str(tmp_path / "articles.db"))
+        summarizer = ArticleSummarizer(api_key="k", client=FakeClient(), cache=cache)
+        articles = [{"url": "https://a.com/1", "title": "記事1", "summary": ""}]
+
+        first = summarizer.summarize_articles(articles)[0]
+        second = summarizer.summarize_articles(articles)[0]
+        cache.close()
+
+        assert first["usage"] == {
+            "input_tokens": len("タイトル: 記事1"),
+            "output_tokens": 10,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 100,
+        }
+        assert second["usage"]["input_tokens"] == 0
+        assert summarizer.usage_totals["cache_read_input_tokens"] == 100
@@ -0,0 +1,58 @@
+from src.summarizer.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_容量内なら待たずに取得できる(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            assert bucket.acquire() == 0.0
+        assert clock.sleeps == []
+
+    def test_容量を超えると補充されるまで待つ(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            bucket.acquire()
+
+        waited = bucket.acquire()
+
+        assert abs(waited - 1.0) < 1e-9
+        assert abs(clock.now - 1.0) < 1e-9
+
+    def test_容量を超える要求は容量分に丸められる(self):
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+        assert bucket.acquire(1000) == 0.0
+
+
+class TestRateLimiter:
+    def test_リクエスト数とトークン数の両方で制限される(self):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=600, tokens_per_minute=1000, clock=clock, sleep=clock.sleep
+        )
+        limiter.acquire(tokens=1000)
+
+        waited = limiter.acquire(tokens=500)
+
+        assert abs(waited - 30.0) < 1e-9
+
+    def test_制限なしなら待たない(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        for _ in range(1000):
+            assert limiter.acquire(tokens=10_000) == 0.0
@@ -0,0 +1,76 @@
+import pytest
+
+from src.summarizer.summary_cache import SummaryCache, cache_key, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    summary_cache = SummaryCache(str(tmp_path / "test.db"), clock=clock)
+    yield summary_cache
+    summary_cache.close()
+
+
+class TestCacheKey:
+    def test_空白や大文字小文字の違いは同じキーになる(self):
+        a = cache_key("New  LLM", "Body\ntext", "model", "prompt")
+        b = cache_key(" new llm ", "body text", "model", "prompt")
+        assert a == b
+
+    def test_モデルやプロンプトが異なれば別のキーになる(self):
+        base = cache_key("T", "C", "model-a", "prompt")
+        assert base != cache_key("T", "C", "model-b", "prompt")
+        assert base != cache_key("T", "C", "model-a", "other prompt")
+
+    def test_全角英数字は正規化される(self):
+        assert normalize_text("ＡＩ　ニュース") == "ai ニュース"
+
+
+class TestSummaryCache:
+    def test_保存した要約を取得できヒット数を数える(self, cache):
+        assert cache.get("k1") is None
+        cache.put("k1", "要約")
+        assert cache.get("k1") == "要約"
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_再起動後もキャッシュが残る(self, tmp_path, cache):
+        cache.put("k1", "要約")
+        reopened = SummaryCache(cache.db_path)
+        assert reopened.get("k1") == "要約"
+        reopened.close()
+
+    def test_期限切れのエントリは取得されず削除される(self, tmp_path, clock):
+        cache = SummaryCache(str(tmp_path / "test.db"), max_age_days=1, clock=clock)
+        cache.put("old", "古い要約")
+        clock.now += 2 * 86400
+        cache.put("new", "新しい要約")
+
+        assert cache.get("old") is None
+        assert cache.evict() == 1
+        assert len(cache) == 1
+        cache.close()
+
+    def test_件数上限を超えると最近使われていないものから削除される(self, tmp_path, clock):
+        cache = SummaryCache(str(tmp_path / "test.db"), max_entries=2, clock=clock)
+        for key in ("a", "b", "c"):
+            cache.put(key, key)
+            clock.now += 1
+        cache.get("a")
+
+        assert cache.evict() == 1
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert cache.get("c") == "c"
+        cache.close()